@@ -4,7 +4,21 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import os
-import io
+from graficos import MAX_PONTOS_SERIE, escolher_granularidade, exibir_grafico, grafico_pizza, reduzir_serie
+from periodos import janela_movel, mes, periodos_disponiveis
+from dependencias import MEMORIA_MAXIMA_MB, descrever, memoria_por_empresa, obter
+from dados import GRANULARIDADES  # e registra os nós dados_mensais e lucro_por_periodo
+import anomalias  # registra o nó anomalias
+from categorias import GRUPOS_FORA_DESPESAS
+from validacao import exibir_validacao
+from empresas import empresa_atual, selecionar_empresa
+from busca import exibir_busca
+from exportacao import gerar_relatorio_completo
+from formatacao import com_rotulos, formatar_moeda, tabela_formatada
+from api import iniciar_se_configurado
+
+# API local com os agregados do dashboard, se FIN_API_PORTA estiver definida (ver api.py)
+iniciar_se_configurado()
 
 # ---------------------------
 # Configurações Iniciais
@@ -24,198 +38,18 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ---------------------------
-# Constantes de Diretórios e Arquivos
-# ---------------------------
-BASE_DATA_DIR = "data"           # Pasta onde as planilhas estarão
-BASE_IMAGE_DIR = "images"         # Pasta onde as imagens estarão (caso queira utilizá-las)
-EXCEL_DADOS_FILE = os.path.join(BASE_DATA_DIR, "dados.xlsx")          # Arquivo Excel principal para o dashboard
-EXCEL_CONTA_FILE = os.path.join(BASE_DATA_DIR, "conta_corrente.xlsx") # Arquivo Excel com a Conta Corrente
-
-# ---------------------------
-# Função Auxiliar para Formatação de Valores
-# ---------------------------
-def format_currency(value):
-    """
-    Formata um número float para o padrão monetário desejado:
-    milhares separados por ponto e decimal separado por vírgula.
-    Exemplo: 1234567.89 -> 'R$ 1.234.567,89'
-    """
-    formatted = f"{value:,.2f}"
-    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {formatted}"
-
-# ---------------------------
-# Função para importar dados do Excel (Layout Vertical)
-# ---------------------------
-def load_data_from_excel_layout_vertical():
-    """
-    Lê o arquivo Excel (EXCEL_DADOS_FILE) com layout vertical.
-    Espera que:
-      - A célula A2 contenha "PERÍODO" e as células à direita (B2, C2, etc) contenham os períodos no formato "MÊS.ANO"
-      - A partir da linha 3, a coluna A contém os nomes das categorias e as colunas seguintes possuem os valores para cada período.
-    
-    Retorna um DataFrame no formato longo com as colunas: Data, Categoria, Valor, Tipo.
-    """
-    if not os.path.exists(EXCEL_DADOS_FILE):
-        st.error(f"O arquivo {EXCEL_DADOS_FILE} não foi encontrado!")
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-    try:
-        df_excel = pd.read_excel(EXCEL_DADOS_FILE, header=None)
-        
-        # Obtém os períodos (linha 2 – índice 1) a partir da coluna B em diante
-        raw_periods = df_excel.iloc[1, 1:].tolist()
-        
-        # Mapeamento dos nomes dos meses em português para números
-        month_map = {
-            "JANEIRO": "01",
-            "FEVEREIRO": "02",
-            "MARÇO": "03",
-            "ABRIL": "04",
-            "MAIO": "05",
-            "JUNHO": "06",
-            "JULHO": "07",
-            "AGOSTO": "08",
-            "SETEMBRO": "09",
-            "OUTUBRO": "10",
-            "NOVEMBRO": "11",
-            "DEZEMBRO": "12"
-        }
-        
-        # Processa os períodos para o formato "YYYY-MM"
-        processed_periods = []
-        for p in raw_periods:
-            p_str = str(p).strip()
-            if p_str.lower() == "nan" or p_str == "":
-                processed_periods.append("")
-            else:
-                parts = p_str.split(".")
-                if len(parts) == 2:
-                    month_name = parts[0].strip().upper()
-                    year = parts[1].strip()
-                    month_num = month_map.get(month_name, "00")
-                    period_standard = f"{year}-{month_num}"
-                    processed_periods.append(period_standard)
-                else:
-                    processed_periods.append(p_str)
-        
-        # Reordena os períodos cronologicamente
-        period_index_pairs = [(i, p) for i, p in enumerate(processed_periods) if p != ""]
-        period_index_pairs.sort(key=lambda x: x[1])
-        sorted_indices = [i for i, p in period_index_pairs]
-        sorted_periods = [p for i, p in period_index_pairs]
-        
-        # Seleciona os valores das transações a partir da linha 3
-        data_values = df_excel.iloc[2:, 1:]
-        data_values = data_values.iloc[:, sorted_indices]
-        
-        # Define as categorias a partir da coluna A (a partir da linha 3)
-        categories = df_excel.iloc[2:, 0].tolist()
-        
-        records = []
-        for i, cat in enumerate(categories):
-            category_str = str(cat).strip()
-            # Ignora as categorias que representam totais
-            if category_str.upper() in {"RECEITAS", "DESPESAS"}:
-                continue
-            for j, period in enumerate(sorted_periods):
-                if period == "":
-                    continue
-                value = data_values.iloc[i, j]
-                if pd.notnull(value):
-                    valor = float(value)
-                    if valor < 0:
-                        tipo = "Despesa"
-                        valor = abs(valor)
-                    else:
-                        tipo = "Receita"
-                    records.append({
-                        "Data": period,  # Formato "YYYY-MM"
-                        "Categoria": category_str,
-                        "Valor": valor,
-                        "Tipo": tipo
-                    })
-        df_imported = pd.DataFrame(records)
-        return df_imported
-
-    except Exception as e:
-        st.error("Erro ao carregar o arquivo Excel: " + str(e))
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-
-# ---------------------------
-# Função para ler os dados da Conta Corrente
-# ---------------------------
-def load_data_conta_corrente(sheet_name="03.2025"):
-    """
-    Lê os dados da Conta Corrente do arquivo EXCEL_CONTA_FILE.
-    
-    O layout da planilha é exatamente o seguinte:
-
-        CONTA CORRENTE MARÇO
-        FATURAMENTO REALIZADO
-        FATURAMENTO LOJAS          R$ 203.808,15 
-        FATURAMENTO DISPLAY/ATACADO R$ 5.338,96 
-        DESCONTO LOJAS             R$ 555,54 
-        PERDAS LOJAS               R$ 567,14 
-        RESULTADO DO FATURAMENTO   R$ 208.579,97 
-        LIMITE COMPRA MÊS          R$ 83.658,84 
-        COMPRA PARA ATACADO        R$ 2.000,00 
-        SALDO DISPONIVEL PARA COMPRAS R$ 13.272,67 
-        CUSTO FIXO GERAL (CD + LOJAS) R$ 152.000,00 
-        DEVOLUÇÃO                
-        TRANSFERENCIA PRODUTO ENTRE LOJAS R$ 77.820,62 
-                
-        COMPRAS REALIZADA ATÉ O MOMENTO
-        COMPRAS PARA APROVAR (PENDENTE) R$ 465,00 
-        COMPRAS EM TRÂNSITO          R$ 7.965,61 
-        TOTAL COMPRAS NOTA FISCAL    R$ 52.300,52 
-        TOTAL COMPRAS NOTA ESPECIAL  R$ 10.120,04 
-        TOTAL RECEBIDAS GERAL        R$ 62.420,56 
-        TOTAL RECEBIDAS + TRÂNSITO     R$ 70.386,17 
-
-    Como há linhas de cabeçalho/grupo (que não possuem valor), a função converte apenas as células que
-    apresentem string no formato monetário.
-    
-    Retorna um DataFrame com as colunas: [Descricao, Valor].
-    """
-    if not os.path.exists(EXCEL_CONTA_FILE):
-        st.error(f"O arquivo {EXCEL_CONTA_FILE} não foi encontrado!")
-        return pd.DataFrame()
-    try:
-        df = pd.read_excel(EXCEL_CONTA_FILE, sheet_name=sheet_name, header=None)
-        df.columns = ["Descricao", "Valor"]
-
-        def convert_to_float(valor):
-            if pd.isna(valor):
-                return None
-            if isinstance(valor, (int, float)):
-                return float(valor)
-            valor = str(valor).strip()
-            # Somente converte se estiver no formato monetário
-            if not valor.startswith("R$"):
-                return None
-            valor = valor.replace("R$", "").strip()
-            valor = valor.replace(".", "").replace(",", ".")
-            try:
-                return float(valor)
-            except Exception:
-                return None
-
-        df["Valor"] = df["Valor"].apply(convert_to_float)
-        return df
-
-    except Exception as e:
-        st.error("Erro ao ler os dados da Conta Corrente: " + str(e))
-        return pd.DataFrame()
-
 # ----------------------------------------------------
 # Carregamento dos Dados Principais (Layout Vertical)
 # ----------------------------------------------------
-data = load_data_from_excel_layout_vertical()
+# Dados do dashboard ordenados e indexados por mês (ver dados.py); só são relidos quando
+# dados.xlsx muda. Os seletores de período consultam esta tabela.
+selecionar_empresa()
+exibir_validacao("dados.xlsx")
+dados_mensais = obter("dados_mensais")
+data = dados_mensais.reset_index(drop=True)
 
-# Atualiza a lista de categorias no session_state a partir dos dados importados
-if "Categorias" not in st.session_state:
-    st.session_state.Categorias = sorted(data["Categoria"].unique().tolist()) if not data.empty else []
+# Atualiza a lista de categorias no session_state a partir dos dados da empresa em uso
+st.session_state.Categorias = sorted(data["Categoria"].unique().tolist()) if not data.empty else []
 
 
 col1, col2 ,col3, col4 = st.columns(4)
@@ -229,6 +63,9 @@ with col3:
 with col4:
         st.page_link("pages/Relatorio_Vendas.py", label="Relatório de Vendas", icon="💳")
 
+# Busca em categorias, lojas, fornecedores, pedidos e Conta Corrente (ver busca.py)
+exibir_busca()
+
 
 # Cabeçalho do Dashboard
 st.markdown(
@@ -265,19 +102,18 @@ mes_ano_resumo = f"{int(filtro_ano)}-{int(filtro_mes):02d}"
 
     # Resumo do mês selecionado
 st.header(f"📅 Resumo do Mês:")
-filtro_data = data["Data"] == mes_ano_resumo
-dados_filtrados = data[filtro_data]
+dados_filtrados = mes(dados_mensais, mes_ano_resumo)
 receitas = dados_filtrados[dados_filtrados["Tipo"] == "Receita"]["Valor"].sum()
 despesas = dados_filtrados[dados_filtrados["Tipo"] == "Despesa"]["Valor"].sum()
 saldo = receitas - despesas
 
 col_resumo1, col_resumo2, col_resumo3 = st.columns(3)
 with col_resumo1:
-        st.metric(label="💸 Receitas", value=format_currency(receitas))
+        st.metric(label="💸 Receitas", value=formatar_moeda(receitas))
 with col_resumo2:
-        st.metric(label="🛒 Despesas", value=format_currency(despesas))
+        st.metric(label="🛒 Despesas", value=formatar_moeda(despesas))
 with col_resumo3:
-        st.metric(label="⚖️ Saldo", value=format_currency(saldo))
+        st.metric(label="⚖️ Saldo", value=formatar_moeda(saldo))
 
 if saldo > 0:
         st.success("🎉 Estamos em lucro nesse mês!")
@@ -291,28 +127,11 @@ col1, col2 = st.columns(2)
 with col1:
         st.header("Comparativo Mensal")
         if not data.empty:
-            resumo = data.groupby(["Data", "Tipo"])["Valor"].sum().reset_index()
-            resumo = resumo.rename(columns={"Data": "AnoMes"})
-            resumo["AnoMes_dt"] = pd.to_datetime(resumo["AnoMes"], format="%Y-%m", errors="coerce")
-            selected_year = filtro_ano
-            selected_month = filtro_mes
+            # Dois meses antes e dois depois do mês selecionado (atravessa a virada do ano)
+            janela = janela_movel(dados_mensais, mes_ano_resumo, antes=2, depois=2)
+            resumo_filtered = janela.groupby(["Data", "Tipo"])["Valor"].sum().reset_index()
+            resumo_filtered = resumo_filtered.rename(columns={"Data": "AnoMes"})
 
-            months_to_show = []
-            if selected_month > 1:
-                months_to_show.append(selected_month - 2)
-            if selected_month > 1:
-                months_to_show.append(selected_month - 1)
-            months_to_show.append(selected_month)
-            if selected_month < 12:
-                months_to_show.append(selected_month + 1)
-            if selected_month < 12:
-                months_to_show.append(selected_month + 2)
-
-            resumo_filtered = resumo[
-                (resumo["AnoMes_dt"].dt.year == selected_year) &
-                (resumo["AnoMes_dt"].dt.month.isin(months_to_show))
-            ]
-            
             fig = px.bar(
                 resumo_filtered,
                 x="AnoMes",
@@ -323,19 +142,57 @@ with col1:
                 barmode="group",
                 color_discrete_map={"Receita": "#244610", "Despesa": "#c3670d"},
             )
-            st.plotly_chart(fig, use_container_width=True)
+            exibir_grafico(fig)
         else:
             st.warning("⚠ Nenhuma transação registrada para gerar o gráfico.")
 with col2:
         st.header("Despesas por Categoria")
-        dados_despesas = dados_filtrados[dados_filtrados["Tipo"] == "Despesa"]
-        dados_despesas = dados_despesas[~dados_despesas["Categoria"].isin(["Faturamento - Spezia", "Faturamento - AMD"])]
-        if not dados_despesas.empty:
-            fig_pizza = px.pie(dados_despesas, names="Categoria", values="Valor", title="Distribuição das Despesas")
-            st.plotly_chart(fig_pizza, use_container_width=True)
+        # Totais já agregados por grupo e subcategoria (ver categorias.py); grupos que não são
+        # despesa operacional (ex.: FATURAMENTO) ficam de fora
+        agregados = obter("agregados_categorias")
+        despesas_grupo = mes(agregados["grupo"], mes_ano_resumo)
+        despesas_grupo = despesas_grupo[
+            (despesas_grupo["Tipo"] == "Despesa") & ~despesas_grupo["Grupo"].isin(GRUPOS_FORA_DESPESAS)
+        ]
+        if not despesas_grupo.empty:
+            grupo_detalhe = st.selectbox(
+                "Detalhar grupo", ["Todos"] + despesas_grupo["Grupo"].tolist(), key="detalhe_grupo"
+            )
+            if grupo_detalhe == "Todos":
+                # Categorias além do limite são agrupadas em "Outros"
+                fig_pizza = grafico_pizza(despesas_grupo, "Grupo", "Valor", title="Distribuição das Despesas")
+            else:
+                despesas_sub = mes(agregados["subcategoria"], mes_ano_resumo)
+                despesas_sub = despesas_sub[
+                    (despesas_sub["Tipo"] == "Despesa") & (despesas_sub["Grupo"] == grupo_detalhe)
+                ]
+                fig_pizza = grafico_pizza(despesas_sub, "Subcategoria", "Valor", title=f"Despesas de {grupo_detalhe}")
+            exibir_grafico(fig_pizza)
         else:
             st.warning("Nenhuma despesa registrada para o período selecionado.")
 
+    # Valores fora do padrão: categorias que se afastam da mediana dos meses anteriores
+st.header("🚨 Anomalias")
+lista_anomalias = obter("anomalias")
+if lista_anomalias.empty:
+        st.success("Nenhum valor fora do padrão nos meses carregados.")
+else:
+        destaques = com_rotulos(lista_anomalias.head(10), moeda=["Valor", "Mediana"])
+        st.warning("\n".join(
+            f"- **{linha.Periodo}** · {linha.Categoria} ({linha.Tipo}): {linha.ValorTexto} "
+            f"— {linha.Variacao:+.0%} sobre a mediana de {linha.MedianaTexto}"
+            for linha in destaques.itertuples()
+        ))
+        with st.expander(f"Todas as anomalias ({len(lista_anomalias)})"):
+            st.dataframe(
+                tabela_formatada(
+                    lista_anomalias.assign(Periodo=lista_anomalias["Periodo"].astype(str)), moeda=["Valor", "Mediana"]
+                ).format("{:+.0%}", subset=["Variacao"], decimal=",").format("{:.1f}", subset=["Z"], decimal=","),
+                use_container_width=True,
+                hide_index=True,
+                column_config={"Variacao": "Variação"},
+            )
+
 st.markdown("---")
     # Gráfico Comparativo de Lucro/Prejuízo entre Anos
 st.markdown(
@@ -343,39 +200,56 @@ st.markdown(
     unsafe_allow_html=True
 )
     
-if not data.empty:
-        data["Lucro"] = data.apply(lambda row: row["Valor"] if row["Tipo"] == "Receita" else -row["Valor"], axis=1)
-        data["Data_dt"] = pd.to_datetime(data["Data"], format="%Y-%m", errors="coerce")
-        data = data.dropna(subset=["Data_dt"])
-        data["Ano"] = data["Data_dt"].dt.year
-        data["Mes"] = data["Data_dt"].dt.month
-        
-        df_result = data.groupby(["Ano", "Mes"])["Lucro"].sum().reset_index()
-        month_map_pt = {
-            1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
-            5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
-            9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+# Somas por mês, trimestre e ano já calculadas (ver dados.py). O gráfico usa a granularidade
+# mais fina que caiba no orçamento de barras, então o tamanho da figura não cresce com o histórico.
+lucro_periodos = obter("lucro_por_periodo")
+if not lucro_periodos["Ano"].empty:
+        col_anos, col_granularidade = st.columns([3, 1])
+        with col_anos:
+            anos_disponiveis = lucro_periodos["Ano"]["Ano"].tolist()
+            anos_selecionados = st.multiselect("Selecione os anos para comparar",
+                                               anos_disponiveis, default=anos_disponiveis)
+        with col_granularidade:
+            granularidade_escolhida = st.selectbox(
+                "Agrupar por", ["Automático"] + GRANULARIDADES, key="comparativo_granularidade"
+            )
+
+        selecionados = {
+            granularidade: tabela[tabela["Ano"].isin(anos_selecionados)]
+            for granularidade, tabela in lucro_periodos.items()
         }
-        df_result["MesNome"] = df_result["Mes"].map(month_map_pt)
-        
-        anos_disponiveis = sorted(df_result["Ano"].unique())
-        anos_selecionados = st.multiselect("Selecione os anos para comparar", 
-                                           anos_disponiveis, default=anos_disponiveis)
-        
-        df_compare = df_result[df_result["Ano"].isin(anos_selecionados)]
-        df_compare = df_compare.sort_values(by="Mes")
-        
-        fig_lucro = px.bar(
-        df_compare,
-        x="MesNome",
-        y="Lucro",
-        color="Ano",
-        barmode="group",
-        title="Comparativo Mensal de Lucro/Prejuízo entre Anos",
-        labels={"Lucro": "Lucro/Prejuízo (R$)", "MesNome": "Mês"},
+        # A escolha manual também respeita o orçamento: se não couber, passa para a próxima mais grossa
+        inicio = 0 if granularidade_escolhida == "Automático" else GRANULARIDADES.index(granularidade_escolhida)
+        granularidade = escolher_granularidade(
+            {g: len(selecionados[g]) for g in GRANULARIDADES[inicio:]}, MAX_PONTOS_SERIE
+        )
+        if granularidade_escolhida not in ("Automático", granularidade):
+            st.caption(
+                f"Agrupado por {granularidade.lower()}: por {granularidade_escolhida.lower()} seriam "
+                f"{len(selecionados[granularidade_escolhida])} barras (limite de {MAX_PONTOS_SERIE})."
+            )
 
-    )
-        st.plotly_chart(fig_lucro, use_container_width=True)
+        df_compare = selecionados[granularidade]
+        if granularidade == "Ano":
+            df_compare = reduzir_serie(df_compare, "Lucro", MAX_PONTOS_SERIE)
+            if len(df_compare) < len(selecionados["Ano"]):
+                st.caption(
+                    f"Exibindo {len(df_compare)} de {len(selecionados['Ano'])} anos: "
+                    "os de maior e menor lucro de cada intervalo."
+                )
+            fig_lucro = px.bar(
+                df_compare, x="Rotulo", y="Lucro",
+                title="Lucro/Prejuízo por Ano",
+                labels={"Lucro": "Lucro/Prejuízo (R$)", "Rotulo": "Ano"},
+            )
+        else:
+            df_compare = df_compare.sort_values(["Posicao", "Ano"]).astype({"Ano": str})
+            fig_lucro = px.bar(
+                df_compare, x="Rotulo", y="Lucro", color="Ano", barmode="group",
+                title=f"Comparativo de Lucro/Prejuízo por {granularidade} entre Anos",
+                labels={"Lucro": "Lucro/Prejuízo (R$)", "Rotulo": granularidade},
+            )
+        exibir_grafico(fig_lucro)
 else:
         st.warning("⚠️ Nenhuma transação registrada para gerar o gráfico de lucro/prejuízo.")
 
@@ -388,24 +262,21 @@ col_reg1, col_reg2 = st.columns(2)
 with col_reg1:
         filtro_categoria = st.selectbox("Filtrar por Categoria", ["Todos"] + st.session_state.Categorias, key="filtro_categoria")
 with col_reg2:
-        meses_disponiveis = sorted(data["Data"].unique()) if not data.empty else []
+        meses_disponiveis = [p.strftime("%Y-%m") for p in periodos_disponiveis(dados_mensais)]
         filtro_mes_reg = st.selectbox("Filtrar por Mês", ["Todos"] + meses_disponiveis, key="filtro_mes_reg")
     
-data_filtrada = data.copy()
+# Mesma tabela de dados_mensais, com os textos em reais já calculados (ver formatacao.py)
+dados_exibicao = obter("dados_mensais_exibicao")
+data_filtrada = dados_exibicao if filtro_mes_reg == "Todos" else mes(dados_exibicao, filtro_mes_reg)
 if filtro_categoria != "Todos":
         data_filtrada = data_filtrada[data_filtrada["Categoria"] == filtro_categoria]
-if filtro_mes_reg != "Todos":
-        data_filtrada = data_filtrada[data_filtrada["Data"] == filtro_mes_reg]
+data_filtrada = data_filtrada.reset_index(drop=True)
     
-data_filtrada_view = data_filtrada.drop(columns=["Lucro", "Data_dt", "Ano", "Mes"], errors="ignore")
+data_filtrada_view = data_filtrada
     
 if not data_filtrada_view.empty:
         st.dataframe(
-            data_filtrada_view.style.format(
-                {"Valor": "R$ {:,.2f}"},
-                thousands=".",
-                decimal=","
-            ),
+            tabela_formatada(data_filtrada_view, moeda=["Valor"]),
             use_container_width=True
         )
 else:
@@ -414,24 +285,42 @@ else:
     # Exportação de Dados
 st.header("📤 Exportar Dados")
 if not data.empty:
-        col_exp1, col_exp2 = st.columns(2)
+        # Os arquivos são gerados só no clique (ver exportacao.py); a função roda fora da
+        # sessão, por isso a empresa é fixada aqui
+        empresa = empresa_atual()
+        col_exp1, col_exp2, col_exp3 = st.columns(3)
         with col_exp1:
-            csv = data.to_csv(index=False).encode("utf-8")
             st.download_button(
                 label="📥 Baixar CSV",
-                data=csv,
+                data=lambda: obter("exportacao_csv", empresa),
                 file_name="financas.csv",
                 mime="text/csv",
+                on_click="ignore",
             )
         with col_exp2:
-            buffer = io.BytesIO()
-            data.to_excel(buffer, index=False)
-            buffer.seek(0)
             st.download_button(
                 label="📥 Baixar Excel",
-                data=buffer,
+                data=lambda: obter("exportacao_excel", empresa),
                 file_name="financas.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
+            )
+        with col_exp3:
+            # Relatório completo: cubo mensal, conta corrente, lojas e compras
+            st.download_button(
+                label="📥 Relatório Completo",
+                data=lambda: gerar_relatorio_completo(empresa),
+                file_name="relatorio_completo.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
             )
 else:
-        st.warning("⚠ Nenhuma transação registrada para exportar.")
\ No newline at end of file
+        st.warning("⚠ Nenhuma transação registrada para exportar.")
+
+# Situação do grafo de dependências entre planilhas e dados derivados (abrir com ?debug=1)
+if st.query_params.get("debug"):
+    with st.expander("🔧 Grafo de dependências"):
+        st.dataframe(descrever(), use_container_width=True, hide_index=True)
+        memoria = pd.Series(memoria_por_empresa(), name="Bytes").rename_axis("Empresa").reset_index()
+        st.caption(f"Memória em cache por empresa (limite: {MEMORIA_MAXIMA_MB:.0f} MB)")
+        st.dataframe(memoria, use_container_width=True, hide_index=True)
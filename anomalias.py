@@ -0,0 +1,104 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dados  # registra o nó dados_mensais
+from dependencias import registrar
+
+# Meses anteriores usados como referência para cada mês (mediana móvel)
+JANELA_MESES = 6
+# Quantidade mínima de meses com valor na janela para avaliar um mês
+MINIMO_MESES = 3
+# |z| robusto a partir do qual o valor é considerado anômalo
+LIMITE_Z = 3.5
+# Variação mínima sobre a mediana para sinalizar; evita alertas em categorias muito estáveis
+# (ex.: aluguel), onde qualquer reajuste pequeno já dá um z alto
+VARIACAO_MINIMA = 0.25
+# Constante que torna o MAD comparável ao desvio padrão em dados normais
+_FATOR_MAD = 0.6745
+
+# Linha com o total de cada tipo, para detectar meses em que as despesas (ou receitas) disparam
+CATEGORIA_TOTAL = "TOTAL"
+
+
+def matriz_categoria_mes(dados_mensais):
+    """
+    Monta a matriz (Tipo, Categoria) x mês com os valores de `dados_mensais` (tabela indexada por
+    mês, ver periodos.indexar_por_mes), incluindo uma linha de total por tipo. Meses sem
+    lançamento ficam NaN, e todos os meses entre o primeiro e o último aparecem como colunas.
+    """
+    if dados_mensais.empty:
+        return pd.DataFrame()
+    base = dados_mensais.reset_index(names="Periodo")
+    matriz = base.pivot_table(
+        index=["Tipo", "Categoria"], columns="Periodo", values="Valor", aggfunc="sum", observed=True
+    )
+    totais = base.pivot_table(index="Tipo", columns="Periodo", values="Valor", aggfunc="sum", observed=True)
+    totais.index = pd.MultiIndex.from_product([totais.index, [CATEGORIA_TOTAL]], names=["Tipo", "Categoria"])
+    matriz = pd.concat([matriz, totais])
+    meses = pd.period_range(matriz.columns.min(), matriz.columns.max(), freq="M")
+    return matriz.reindex(columns=meses)
+
+
+def zscores_robustos(valores, janela=JANELA_MESES, minimo=MINIMO_MESES):
+    """
+    Z-score robusto de cada célula de uma matriz (linhas x meses) em relação aos `janela` meses
+    anteriores da mesma linha: (valor - mediana) / (MAD / 0,6745). Tudo é calculado de uma vez
+    para a matriz inteira. Retorna (z, mediana), com NaN onde não há histórico suficiente
+    ou a janela não varia (MAD zero).
+    """
+    valores = np.asarray(valores, dtype="float64")
+    linhas, meses = valores.shape
+    # A janela do mês t cobre os meses t-janela .. t-1 (o próprio mês fica de fora)
+    preenchido = np.concatenate([np.full((linhas, janela), np.nan), valores], axis=1)
+    janelas = sliding_window_view(preenchido, janela, axis=1)[:, :meses]
+
+    with warnings.catch_warnings():
+        # Janelas sem nenhum valor geram avisos de "All-NaN slice"; o resultado NaN é o esperado
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mediana = np.nanmedian(janelas, axis=2)
+        mad = np.nanmedian(np.abs(janelas - mediana[..., None]), axis=2)
+
+    suficiente = np.count_nonzero(~np.isnan(janelas), axis=2) >= minimo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(suficiente & (mad > 0), _FATOR_MAD * (valores - mediana) / mad, np.nan)
+    return z, mediana
+
+
+def detectar_anomalias(dados_mensais, janela=JANELA_MESES, minimo=MINIMO_MESES, limite=LIMITE_Z,
+                       variacao_minima=VARIACAO_MINIMA):
+    """
+    Categorias e meses cujo valor se afasta da mediana móvel dos meses anteriores além de `limite`
+    (z robusto) e de `variacao_minima` (fração da mediana).
+    Retorna as colunas Periodo, Tipo, Categoria, Valor, Mediana, Variacao (fração sobre a
+    mediana) e Z, das maiores anomalias (|Z|) para as menores.
+    """
+    colunas = ["Periodo", "Tipo", "Categoria", "Valor", "Mediana", "Variacao", "Z"]
+    matriz = matriz_categoria_mes(dados_mensais)
+    if matriz.empty:
+        return pd.DataFrame(columns=colunas)
+
+    valores = matriz.to_numpy(dtype="float64")
+    z, mediana = zscores_robustos(valores, janela, minimo)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacao = np.where(mediana != 0, valores / mediana - 1, np.nan)
+    sinalizado = (np.abs(np.nan_to_num(z)) >= limite) & ~(np.abs(variacao) < variacao_minima)
+    linhas, meses = np.nonzero(sinalizado)
+
+    anomalias = pd.DataFrame({
+        "Periodo": matriz.columns[meses],
+        "Tipo": matriz.index.get_level_values("Tipo")[linhas],
+        "Categoria": matriz.index.get_level_values("Categoria")[linhas],
+        "Valor": valores[linhas, meses],
+        "Mediana": mediana[linhas, meses],
+        "Variacao": variacao[linhas, meses],
+        "Z": z[linhas, meses],
+    })
+    ordem = np.argsort(-np.abs(anomalias["Z"].to_numpy()), kind="stable")
+    return anomalias.iloc[ordem][colunas].reset_index(drop=True)
+
+
+# Anomalias da planilha de dados, recalculadas só quando dados.xlsx muda
+registrar("anomalias", ["dados_mensais"], detectar_anomalias)
@@ -0,0 +1,198 @@
+"""
+API HTTP local, somente leitura, com as tabelas agregadas que o dashboard já calcula
+(as mesmas do relatório completo, ver exportacao.AGREGADOS). Outras ferramentas consultam a
+API em vez de abrir as planilhas.
+
+Rotas (GET ou HEAD):
+    /                              recursos e empresas disponíveis
+    /<recurso>?empresa=X&formato=F recurso: cubo-mensal, conta-corrente, performance-lojas,
+                                   compras-status; formato: json (padrão) ou arrow
+
+Cada resposta traz um ETag derivado da versão das planilhas; com If-None-Match igual ao ETag
+atual a resposta é 304, sem recalcular nem serializar nada.
+
+Uso como processo separado:
+    python api.py --porta 8502
+Ou dentro do processo do Streamlit: defina FIN_API_PORTA e o Inicio.py inicia o servidor.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow as pa
+
+from dependencias import obter, registrar, versao
+from empresas import EMPRESA_PADRAO, listar_empresas
+from exportacao import AGREGADOS
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8502
+
+# Recurso da URL -> nó do grafo de dependências
+RECURSOS = {
+    "cubo-mensal": AGREGADOS["Cubo Mensal"],
+    "conta-corrente": AGREGADOS["Conta Corrente"],
+    "performance-lojas": AGREGADOS["Performance Lojas"],
+    "compras-status": AGREGADOS["Compras por Status"],
+}
+TIPOS_CONTEUDO = {
+    "json": "application/json; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+_trava = threading.Lock()
+_servidor = None
+
+
+def calcular_etag(empresa, recurso, formato):
+    """ETag da versão atual de um recurso: só muda quando alguma planilha de origem muda."""
+    chave = repr((empresa, recurso, formato, versao(RECURSOS[recurso], empresa)))
+    return '"' + hashlib.sha1(chave.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_confere(if_none_match, etag):
+    """
+    Se o cabeçalho If-None-Match (lista de ETags separados por vírgula, ou "*") inclui `etag`.
+    A comparação é a fraca do HTTP: o prefixo W/ é ignorado e as tags são comparadas inteiras.
+    """
+    for tag in re.findall(r'\*|(?:W/)?"[^"]*"', if_none_match):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def serializar(tabela, formato):
+    """Converte uma tabela para bytes em JSON (lista de registros) ou Arrow (IPC stream)."""
+    if formato == "arrow":
+        tabela_arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+        saida = pa.BufferOutputStream()
+        with pa.ipc.new_stream(saida, tabela_arrow.schema) as escritor:
+            escritor.write_table(tabela_arrow)
+        return saida.getvalue().to_pybytes()
+    return tabela.to_json(orient="records", date_format="iso", force_ascii=False).encode("utf-8")
+
+
+def _no_resposta(recurso, formato):
+    return f"api_{recurso}_{formato}"
+
+
+# Respostas serializadas de cada recurso e formato: nós do grafo, guardados por empresa e versão
+# dentro do limite de memória do cache
+for _recurso, _no in RECURSOS.items():
+    for _formato in TIPOS_CONTEUDO:
+        registrar(
+            _no_resposta(_recurso, _formato), [_no],
+            lambda tabela, formato=_formato: serializar(tabela, formato),
+        )
+
+
+def resposta(empresa, recurso, formato):
+    """Retorna (etag, conteúdo) do recurso, serializando-o só uma vez por versão."""
+    return calcular_etag(empresa, recurso, formato), obter(_no_resposta(recurso, formato), empresa)
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    server_version = "FinAPI/1.0"
+
+    def _enviar(self, status, conteudo=b"", tipo="application/json; charset=utf-8", etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        if self.command != "HEAD" and status != 304:
+            self.wfile.write(conteudo)
+
+    def _erro(self, status, mensagem):
+        self._enviar(status, json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametros = parse_qs(url.query)
+        recurso = url.path.strip("/")
+        empresa = parametros.get("empresa", [EMPRESA_PADRAO])[0]
+        formato = parametros.get("formato", ["json"])[0].lower()
+
+        if recurso == "":
+            indice = {"recursos": sorted(RECURSOS), "empresas": listar_empresas(), "formatos": sorted(TIPOS_CONTEUDO)}
+            self._enviar(200, json.dumps(indice, ensure_ascii=False).encode("utf-8"))
+            return
+        if recurso not in RECURSOS:
+            self._erro(404, f"Recurso desconhecido: {recurso}")
+            return
+        if formato not in TIPOS_CONTEUDO:
+            self._erro(400, f"Formato inválido: {formato}")
+            return
+        if empresa not in listar_empresas():
+            self._erro(404, f"Empresa desconhecida: {empresa}")
+            return
+
+        try:
+            etag = calcular_etag(empresa, recurso, formato)
+            if etag_confere(self.headers.get("If-None-Match", ""), etag):
+                self._enviar(304, etag=etag)
+                return
+            etag, conteudo = resposta(empresa, recurso, formato)
+        except Exception as e:
+            self._erro(500, f"Erro ao montar {recurso}: {e}")
+            return
+        self._enviar(200, conteudo, TIPOS_CONTEUDO[formato], etag)
+
+    do_HEAD = do_GET
+
+    def log_message(self, formato, *args):
+        # Sem log por requisição: consultas periódicas encheriam o terminal do Streamlit
+        pass
+
+
+def iniciar_servidor(host=HOST_PADRAO, porta=PORTA_PADRAO):
+    """
+    Inicia o servidor em uma thread de fundo, uma única vez por processo, e o retorna.
+    Se a porta já estiver em uso (ex.: outro processo do app), retorna None.
+    """
+    global _servidor
+    with _trava:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, porta), ManipuladorAPI)
+            except OSError:
+                return None
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="api", daemon=True).start()
+        return _servidor
+
+
+def iniciar_se_configurado():
+    """Inicia o servidor dentro do processo atual se a variável FIN_API_PORTA estiver definida."""
+    porta = os.environ.get("FIN_API_PORTA")
+    if porta:
+        return iniciar_servidor(os.environ.get("FIN_API_HOST", HOST_PADRAO), int(porta))
+    return None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="API local somente leitura com os agregados do dashboard.")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    args = parser.parse_args(argumentos)
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), ManipuladorAPI)
+    print(f"API em http://{args.host}:{args.porta}/")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import conta_corrente  # registra o nó lancamentos_conta_corrente
+import dados  # registra o nó dados_mensais
+import vendas  # registra o nó fatos_vendas
+from compras import normalizar_texto  # e registra o nó compras
+from dependencias import obter, registrar
+
+# Similaridade mínima (Dice sobre trigramas) para aceitar uma palavra parecida com a buscada
+SIMILARIDADE_MINIMA = 0.5
+# Pontuação de cada tipo de correspondência de uma palavra da busca
+PONTOS_EXATA = 3.0
+PONTOS_PREFIXO = 2.0
+
+_PADRAO_PALAVRA = re.compile(r"[A-Z0-9]+")
+
+
+def _documentos(dados_mensais, fatos, compras_, lancamentos):
+    """
+    Itens pesquisáveis, um por (Tipo, Texto), com a página onde aparecem e em quantas
+    linhas ocorrem.
+    """
+    fontes = [
+        ("Categoria", "Início", dados_mensais["Categoria"]),
+        ("Loja", "Relatório de Vendas", fatos["LOJA"]),
+        ("Fornecedor", "Compras", compras_["Fornecedor"]),
+        ("Pedido", "Compras", compras_["Pedido"].dropna().astype("Int64").astype(str).radd("PEDIDO ")),
+        ("Conta Corrente", "Conta Corrente", lancamentos["Descricao"][lancamentos["Descricao"] != "NAN"]),
+    ]
+    partes = [
+        pd.DataFrame({"Tipo": tipo, "Texto": valores.dropna().astype(str).str.strip(), "Pagina": pagina})
+        for tipo, pagina, valores in fontes
+    ]
+    documentos = pd.concat(partes, ignore_index=True)
+    documentos = documentos[documentos["Texto"] != ""]
+    return (
+        documentos.groupby(["Tipo", "Texto", "Pagina"], sort=False, observed=True)
+        .size().rename("Ocorrencias").reset_index()
+    )
+
+
+def _trigramas(palavra):
+    marcada = f" {palavra} "
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+
+def montar_indice(dados_mensais, fatos, compras_, lancamentos):
+    """
+    Índice de busca sobre categorias, lojas, fornecedores, pedidos e lançamentos da Conta
+    Corrente. Os textos são normalizados (caixa alta, sem acento) e quebrados em palavras:
+      - vocabulario: palavras distintas em ordem alfabética (busca por prefixo com searchsorted);
+      - postagens: para cada palavra, os documentos em que aparece;
+      - trigramas: para cada trigrama, as palavras que o contêm (busca aproximada).
+    """
+    documentos = _documentos(dados_mensais, fatos, compras_, lancamentos)
+    normalizados = normalizar_texto(documentos["Texto"]).fillna("").tolist()
+
+    postagens_por_palavra = defaultdict(set)
+    for posicao, texto in enumerate(normalizados):
+        for palavra in _PADRAO_PALAVRA.findall(texto):
+            postagens_por_palavra[palavra].add(posicao)
+
+    vocabulario = np.array(sorted(postagens_por_palavra), dtype=object)
+    postagens = [np.fromiter(sorted(postagens_por_palavra[p]), dtype=np.int64) for p in vocabulario]
+
+    palavras_por_trigrama = defaultdict(list)
+    for posicao, palavra in enumerate(vocabulario):
+        for trigrama in _trigramas(palavra):
+            palavras_por_trigrama[trigrama].append(posicao)
+
+    return {
+        "documentos": documentos,
+        "vocabulario": vocabulario,
+        "tamanhos": np.array([len(_trigramas(p)) for p in vocabulario], dtype=np.int64),
+        "postagens": postagens,
+        "trigramas": {t: np.array(ids, dtype=np.int64) for t, ids in palavras_por_trigrama.items()},
+    }
+
+
+def _pontuar_palavra(indice, palavra):
+    """Pontuação de cada palavra do vocabulário para uma palavra da busca (0 = não corresponde)."""
+    vocabulario = indice["vocabulario"]
+    pontos = np.zeros(len(vocabulario))
+
+    # Prefixo: palavras do vocabulário entre `palavra` e `palavra` + maior caractere possível
+    inicio = np.searchsorted(vocabulario, palavra, side="left")
+    fim = np.searchsorted(vocabulario, palavra + "\uffff", side="left")
+    pontos[inicio:fim] = PONTOS_PREFIXO
+    if inicio < fim and vocabulario[inicio] == palavra:
+        pontos[inicio] = PONTOS_EXATA
+
+    # Aproximada: trigramas em comum (coeficiente de Dice), para erros de digitação
+    trigramas = _trigramas(palavra)
+    candidatos = [indice["trigramas"][t] for t in trigramas if t in indice["trigramas"]]
+    if candidatos:
+        comuns = np.bincount(np.concatenate(candidatos), minlength=len(vocabulario))
+        similaridade = 2 * comuns / (indice["tamanhos"] + len(trigramas))
+        aproximadas = similaridade >= SIMILARIDADE_MINIMA
+        pontos[aproximadas] = np.maximum(pontos[aproximadas], similaridade[aproximadas])
+    return pontos
+
+
+def buscar(indice, consulta, limite=20):
+    """
+    Busca sem diferenciar acentos e maiúsculas. Todas as palavras da consulta precisam
+    corresponder (exata, por prefixo ou aproximada) a alguma palavra do item.
+    Retorna as colunas Tipo, Texto, Pagina, Ocorrencias e Pontos, das melhores para as piores.
+    """
+    colunas = ["Tipo", "Texto", "Pagina", "Ocorrencias", "Pontos"]
+    palavras = _PADRAO_PALAVRA.findall(normalizar_texto(pd.Series([consulta])).fillna("").iloc[0])
+    documentos = indice["documentos"]
+    if not palavras or documentos.empty:
+        return pd.DataFrame(columns=colunas)
+
+    total = np.zeros(len(documentos))
+    encontrados = np.ones(len(documentos), dtype=bool)
+    for palavra in palavras:
+        pontos_palavra = _pontuar_palavra(indice, palavra)
+        correspondentes = np.flatnonzero(pontos_palavra)
+        melhor = np.zeros(len(documentos))
+        if len(correspondentes):
+            listas = [indice["postagens"][posicao] for posicao in correspondentes]
+            np.maximum.at(
+                melhor,
+                np.concatenate(listas),
+                np.repeat(pontos_palavra[correspondentes], [len(lista) for lista in listas]),
+            )
+        encontrados &= melhor > 0
+        total += melhor
+
+    posicoes = np.flatnonzero(encontrados)
+    resultado = documentos.iloc[posicoes].assign(Pontos=total[posicoes])
+    return resultado.sort_values(["Pontos", "Ocorrencias"], ascending=False).head(limite)[colunas]
+
+
+# Índice reconstruído só quando alguma das planilhas pesquisadas muda
+registrar(
+    "indice_busca", ["dados_mensais", "fatos_vendas", "compras", "lancamentos_conta_corrente"], montar_indice
+)
+
+
+def exibir_busca():
+    """Caixa de busca global: procura em categorias, lojas, fornecedores, pedidos e Conta Corrente."""
+    consulta = st.text_input(
+        "🔎 Buscar", key="busca_global", placeholder="Categoria, loja, fornecedor, pedido..."
+    )
+    if not consulta.strip():
+        return
+    resultados = buscar(obter("indice_busca"), consulta)
+    if resultados.empty:
+        st.info(f"Nada encontrado para \"{consulta}\".")
+        return
+    st.dataframe(
+        resultados.drop(columns="Pontos"),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Pagina": "Página", "Ocorrencias": "Ocorrências"},
+    )
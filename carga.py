@@ -0,0 +1,349 @@
+"""
+Teste de carga: sobe um servidor `streamlit run` e dispara várias sessões simultâneas contra
+ele (pelo mesmo websocket que o navegador usa), medindo o tempo de cada rerun das páginas.
+
+Uso:
+    python carga.py --sessoes 8 --repeticoes 3 --saida relatorio_carga.json
+
+Cada sessão abre o Inicio.py e troca para as páginas em pages/, executando um roteiro de
+interações (troca de mês, filtros de categoria, troca de aba, busca). Cada rerun é medido de
+ponta a ponta: do envio da interação até o servidor avisar que o script terminou, com as
+sessões disputando o mesmo servidor. Ao final são exibidos p50/p95/p99 da latência por página
+e ação, pico de memória (RSS) do servidor e quantas vezes cada planilha foi lida e cada dado
+derivado recalculado no cache compartilhado (lidos do próprio servidor, em uma sessão com
+?debug=1). Com --saida o relatório também é gravado em JSON, para comparar entre versões e
+tamanhos de planilha.
+
+O servidor lê uma cópia temporária da pasta de dados (FIN_DATA_DIR), então os snapshots que
+ele grava (ver snapshots.py) não vão para a pasta real.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit
+import websockets
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from empresas import BASE_DATA_DIR
+
+DIRETORIO_APP = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_INICIAL = "Inicio.py"
+PERCENTIS = [50, 95, 99]
+TEXTO_BUSCA = "a"
+
+# Páginas e roteiro de interação de cada uma: (ação, chave do widget). Nos selectboxes são
+# testadas algumas opções além da selecionada; nos campos de texto é digitado TEXTO_BUSCA.
+ROTEIROS = {
+    "Inicio.py": [("mês", "resumo_mes"), ("categoria", "filtro_categoria"), ("mês registros", "filtro_mes_reg")],
+    "pages/Compras.py": [("mês", "compras_mes"), ("aba", "compras_aba"), ("busca", "compras_busca")],
+    "pages/Conta_Corrente.py": [("mês", "cc_mes")],
+    "pages/Relatorio_Vendas.py": [("mês", "vendas_mes")],
+}
+
+
+class ErroRoteiro(Exception):
+    """O widget do roteiro não apareceu na página (a página falhou ou mudou de layout)."""
+
+
+class Sessao:
+    """Uma sessão do app conectada ao servidor, como uma aba do navegador."""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.paginas = {}
+        self.pagina = ""
+        self.widgets = {}
+        self.estados = {}
+        self.tabelas = []
+
+    async def rerun(self, query_string="", timeout=120):
+        """
+        Pede um rerun da página atual com os valores dos widgets alterados nesta sessão e
+        espera o script terminar. Retorna (segundos, falhou).
+        """
+        mensagem = BackMsg()
+        estado = mensagem.rerun_script
+        estado.query_string = query_string
+        estado.page_script_hash = self.pagina
+        for widget in self.estados.values():
+            estado.widget_states.widgets.add().CopyFrom(widget)
+
+        self.widgets = {}
+        self.tabelas = []
+        inicio = time.perf_counter()
+        await self.conexao.send(mensagem.SerializeToString())
+        falhou = await asyncio.wait_for(self._aguardar_fim(), timeout)
+        return time.perf_counter() - inicio, falhou
+
+    async def _aguardar_fim(self):
+        """Lê as mensagens do rerun até o fim do script; retorna True se a página teve erro."""
+        falhou = False
+        while True:
+            recebida = ForwardMsg()
+            recebida.ParseFromString(await self.conexao.recv())
+            tipo = recebida.WhichOneof("type")
+            if tipo == "navigation":
+                self.paginas = {pagina.url_pathname: pagina.page_script_hash
+                                for pagina in recebida.navigation.app_pages}
+            elif tipo == "delta" and recebida.delta.WhichOneof("type") == "new_element":
+                falhou |= self._registrar_elemento(recebida.delta.new_element)
+            elif tipo == "script_finished":
+                return falhou or recebida.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+
+    def _registrar_elemento(self, elemento):
+        """Guarda widgets com chave e tabelas do rerun; retorna True se o elemento é um erro."""
+        tipo = elemento.WhichOneof("type")
+        if tipo == "dataframe":
+            self.tabelas.append(elemento.dataframe.arrow_data.data)
+        elif tipo in ("selectbox", "text_input"):
+            widget = getattr(elemento, tipo)
+            # O id de um widget com chave termina em "-<chave>"
+            self.widgets[widget.id.rsplit("-", 1)[-1]] = (tipo, widget)
+        return tipo == "exception" or (tipo == "alert" and elemento.alert.format == Alert.ERROR)
+
+    def trocar_pagina(self, pagina):
+        """Próximo rerun abre `pagina` (caminho relativo ao app), como um clique no menu."""
+        nome = os.path.splitext(os.path.basename(pagina))[0]
+        self.pagina = self.paginas.get("" if pagina == SCRIPT_INICIAL else nome, "")
+        self.estados = {}
+
+    def _widget(self, chave):
+        if chave not in self.widgets:
+            raise ErroRoteiro(chave)
+        return self.widgets[chave]
+
+    def interacoes(self, chave, limite):
+        """Valores a enviar para o widget `chave`, um por rerun."""
+        tipo, widget = self._widget(chave)
+        if tipo == "text_input":
+            return [TEXTO_BUSCA]
+        if widget.HasField("raw_value"):
+            atual = widget.raw_value
+        else:
+            atual = widget.options[widget.default] if widget.HasField("default") else None
+        return [opcao for opcao in widget.options if opcao != atual][:limite]
+
+    def alterar(self, chave, valor):
+        """Novo valor do widget `chave`, enviado neste e nos próximos reruns da página."""
+        _, widget = self._widget(chave)
+        self.estados[chave] = WidgetState(id=widget.id, string_value=valor)
+
+
+def _endereco(porta):
+    return f"ws://127.0.0.1:{porta}/_stcore/stream"
+
+
+async def executar_sessao(porta, sessao, repeticoes, limite_opcoes, timeout):
+    """Executa o roteiro de todas as páginas em uma sessão e retorna as medições."""
+    medicoes = []
+
+    async def medir(pagina, acao, sessao_app):
+        duracao, falhou = await sessao_app.rerun(timeout=timeout)
+        medicoes.append({
+            "Sessao": sessao, "Pagina": pagina, "Acao": acao,
+            "Segundos": duracao, "Falhou": falhou,
+        })
+
+    async with websockets.connect(_endereco(porta), subprotocols=["streamlit"], max_size=None) as conexao:
+        sessao_app = Sessao(conexao)
+        try:
+            for _ in range(repeticoes):
+                for pagina, roteiro in ROTEIROS.items():
+                    sessao_app.trocar_pagina(pagina)
+                    await medir(pagina, "abrir", sessao_app)
+                    try:
+                        for acao, chave in roteiro:
+                            for valor in sessao_app.interacoes(chave, limite_opcoes):
+                                sessao_app.alterar(chave, valor)
+                                await medir(pagina, acao, sessao_app)
+                    except ErroRoteiro:
+                        medicoes.append({
+                            "Sessao": sessao, "Pagina": pagina, "Acao": "roteiro",
+                            "Segundos": 0.0, "Falhou": True,
+                        })
+        except asyncio.TimeoutError:
+            # O servidor não terminou o rerun a tempo; a sessão para aqui
+            medicoes.append({
+                "Sessao": sessao, "Pagina": pagina, "Acao": "timeout",
+                "Segundos": float(timeout), "Falhou": True,
+            })
+    return medicoes
+
+
+async def calculos_no_servidor(porta, timeout):
+    """Leituras/cálculos por nó no cache do servidor, da tabela exibida pelo Inicio com ?debug=1."""
+    async with websockets.connect(_endereco(porta), subprotocols=["streamlit"], max_size=None) as conexao:
+        sessao_app = Sessao(conexao)
+        await sessao_app.rerun(query_string="debug=1", timeout=timeout)
+    for dados in sessao_app.tabelas:
+        tabela = pa.ipc.open_stream(dados).read_pandas()
+        if {"No", "Calculos"} <= set(tabela.columns):
+            return dict(zip(tabela["No"], tabela["Calculos"].astype(int)))
+    return {}
+
+
+def _porta_livre():
+    with socket.socket() as conexao:
+        conexao.bind(("127.0.0.1", 0))
+        return conexao.getsockname()[1]
+
+
+def iniciar_servidor(dados, porta, log, timeout=60):
+    """Sobe `streamlit run Inicio.py` lendo as planilhas de `dados` e espera ele responder."""
+    comando = [
+        sys.executable, "-m", "streamlit", "run", SCRIPT_INICIAL,
+        "--server.headless", "true",
+        "--server.address", "127.0.0.1",
+        "--server.port", str(porta),
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    servidor = subprocess.Popen(
+        comando, cwd=DIRETORIO_APP, env={**os.environ, "FIN_DATA_DIR": dados},
+        stdout=log, stderr=subprocess.STDOUT,
+    )
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite and servidor.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/_stcore/health", timeout=1) as resposta:
+                if resposta.status == 200:
+                    return servidor
+        except OSError:
+            time.sleep(0.2)
+    parar_servidor(servidor)
+    raise RuntimeError(f"O servidor do Streamlit não respondeu na porta {porta} (log em {log.name})")
+
+
+def parar_servidor(servidor):
+    servidor.terminate()
+    try:
+        servidor.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        servidor.kill()
+        servidor.wait()
+
+
+def _pico_rss_servidor_mb():
+    # Maior RSS entre os processos filhos já encerrados (o servidor); ru_maxrss é em KB no
+    # Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _tamanho_dados(diretorio):
+    total = 0
+    for raiz, _, arquivos in os.walk(diretorio):
+        total += sum(os.path.getsize(os.path.join(raiz, arquivo)) for arquivo in arquivos)
+    return total
+
+
+def resumir_latencias(medicoes):
+    """Percentis de latência (ms) por página e ação, e no total."""
+    def percentis(grupo):
+        valores = grupo["Segundos"].to_numpy() * 1000
+        linha = {f"p{p}": v for p, v in zip(PERCENTIS, np.percentile(valores, PERCENTIS))}
+        linha.update(Reruns=len(valores), Falhas=int(grupo["Falhou"].sum()), Maximo=valores.max())
+        return pd.Series(linha)
+
+    por_acao = medicoes.groupby(["Pagina", "Acao"]).apply(percentis).reset_index()
+    total = percentis(medicoes).to_frame().T.assign(Pagina="(todas)", Acao="(todas)")
+    resumo = pd.concat([por_acao, total], ignore_index=True)
+    return resumo.astype({"Reruns": int, "Falhas": int})
+
+
+async def _disparar_sessoes(porta, sessoes, repeticoes, limite_opcoes, timeout):
+    resultados = await asyncio.gather(*[
+        executar_sessao(porta, sessao, repeticoes, limite_opcoes, timeout) for sessao in range(sessoes)
+    ])
+    return [medicao for medicoes in resultados for medicao in medicoes]
+
+
+def executar_carga(sessoes, repeticoes=1, limite_opcoes=3, timeout=120, dados=BASE_DATA_DIR, porta=None):
+    """
+    Sobe o servidor sobre uma cópia temporária de `dados`, dispara `sessoes` sessões
+    simultâneas e monta o relatório da rodada.
+    """
+    porta = porta or _porta_livre()
+    with tempfile.TemporaryDirectory(prefix="carga_") as temporario:
+        copia = os.path.join(temporario, "data")
+        shutil.copytree(os.path.join(DIRETORIO_APP, dados), copia, ignore=shutil.ignore_patterns(".snapshots"))
+        bytes_dados = _tamanho_dados(copia)
+
+        with open(os.path.join(temporario, "servidor.log"), "w") as log:
+            servidor = iniciar_servidor(copia, porta, log)
+            try:
+                inicio = time.perf_counter()
+                medicoes = asyncio.run(_disparar_sessoes(porta, sessoes, repeticoes, limite_opcoes, timeout))
+                duracao = time.perf_counter() - inicio
+                calculos = asyncio.run(calculos_no_servidor(porta, timeout))
+            finally:
+                parar_servidor(servidor)
+
+    medicoes = pd.DataFrame(medicoes)
+    return {
+        "Data": datetime.now().isoformat(timespec="seconds"),
+        "Python": platform.python_version(),
+        "Streamlit": streamlit.__version__,
+        "Sessoes": sessoes,
+        "Repeticoes": repeticoes,
+        "BytesDados": bytes_dados,
+        "DuracaoSegundos": round(duracao, 3),
+        "ReRunsPorSegundo": round(len(medicoes) / duracao, 2),
+        "PicoRSSMB": round(_pico_rss_servidor_mb(), 1),
+        "Calculos": {no: int(total) for no, total in calculos.items() if total > 0},
+        "Latencias": resumir_latencias(medicoes).round(1).to_dict(orient="records"),
+    }
+
+
+def imprimir_relatorio(relatorio):
+    print(
+        f"{relatorio['Sessoes']} sessões x {relatorio['Repeticoes']} repetições em "
+        f"{relatorio['DuracaoSegundos']:.1f}s ({relatorio['ReRunsPorSegundo']} reruns/s), "
+        f"pico de RSS do servidor {relatorio['PicoRSSMB']:.0f} MB, dados {relatorio['BytesDados'] / 1024:.0f} KB"
+    )
+    print("\nLatência por rerun (ms):")
+    print(pd.DataFrame(relatorio["Latencias"]).to_string(index=False))
+    print("\nLeituras/cálculos por nó (cache do servidor):")
+    for no, quantidade in sorted(relatorio["Calculos"].items()):
+        print(f"  {no}: {quantidade}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas do app.")
+    parser.add_argument("--sessoes", type=int, default=4, help="sessões simultâneas")
+    parser.add_argument("--repeticoes", type=int, default=1, help="vezes que cada sessão percorre o roteiro")
+    parser.add_argument("--opcoes", type=int, default=3, help="opções testadas em cada filtro")
+    parser.add_argument("--timeout", type=float, default=120, help="tempo máximo de cada rerun (s)")
+    parser.add_argument("--dados", default=BASE_DATA_DIR, help="pasta de planilhas copiada para o teste")
+    parser.add_argument("--porta", type=int, help="porta do servidor (padrão: uma porta livre)")
+    parser.add_argument("--saida", help="arquivo JSON para gravar o relatório")
+    args = parser.parse_args(argumentos)
+
+    relatorio = executar_carga(args.sessoes, args.repeticoes, args.opcoes, args.timeout, args.dados, args.porta)
+    imprimir_relatorio(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nRelatório gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
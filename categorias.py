@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+
+import dados  # registra o nó dados_mensais
+from dependencias import registrar, registrar_fonte
+
+# Arquivo opcional, na pasta de cada empresa, com a hierarquia explícita (colunas
+# Categoria;Grupo;Subcategoria). Categorias que não aparecem nele seguem a convenção de nome
+# "GRUPO - SUBCATEGORIA".
+ARQUIVO_CATEGORIAS = "categorias.csv"
+SEPARADOR_CATEGORIA = " - "
+
+# Grupos que não são despesa operacional e ficam fora da distribuição de despesas
+GRUPOS_FORA_DESPESAS = {"FATURAMENTO"}
+
+# Níveis de agregação pré-calculados, do mais geral para o mais detalhado
+NIVEIS = {
+    "tipo": ["Tipo"],
+    "grupo": ["Tipo", "Grupo"],
+    "subcategoria": ["Tipo", "Grupo", "Subcategoria"],
+}
+
+registrar_fonte(ARQUIVO_CATEGORIAS)
+
+
+def _normalizar(nomes):
+    return nomes.astype(str).str.strip().str.upper()
+
+
+def ler_mapeamento(caminho):
+    """Lê o mapeamento de categorias; retorna uma tabela vazia se o arquivo não existir."""
+    colunas = ["Categoria", "Grupo", "Subcategoria"]
+    if not os.path.exists(caminho):
+        return pd.DataFrame(columns=colunas)
+    mapeamento = pd.read_csv(caminho, sep=";", dtype=str, encoding="utf-8").reindex(columns=colunas)
+    mapeamento["Categoria"] = _normalizar(mapeamento["Categoria"])
+    mapeamento["Grupo"] = _normalizar(mapeamento["Grupo"])
+    mapeamento["Subcategoria"] = mapeamento["Subcategoria"].fillna(mapeamento["Categoria"])
+    mapeamento["Subcategoria"] = _normalizar(mapeamento["Subcategoria"])
+    return mapeamento.dropna(subset=["Grupo"]).drop_duplicates("Categoria", keep="last")
+
+
+def montar_hierarquia(dados_mensais, caminho_mapeamento):
+    """
+    Grupo e subcategoria de cada categoria de `dados_mensais`, com as colunas
+    Categoria, Grupo, Subcategoria. O mapeamento do arquivo tem prioridade; nas demais,
+    "FATURAMENTO - SPEZIA" vira grupo FATURAMENTO e subcategoria SPEZIA, e nomes sem
+    separador formam um grupo de uma subcategoria só.
+    """
+    categorias = pd.Series(pd.unique(dados_mensais["Categoria"].astype(str)), name="Categoria")
+    normalizadas = _normalizar(categorias)
+    partes = normalizadas.str.partition(SEPARADOR_CATEGORIA)
+    grupos = partes[0].str.strip()
+    subcategorias = partes[2].str.strip()
+    hierarquia = pd.DataFrame({
+        "Categoria": categorias,
+        "Grupo": grupos,
+        "Subcategoria": subcategorias.where(subcategorias != "", grupos),
+    })
+
+    mapeamento = ler_mapeamento(caminho_mapeamento).set_index("Categoria")
+    mapeado = normalizadas.map(mapeamento["Grupo"]).notna().to_numpy()
+    hierarquia.loc[mapeado, "Grupo"] = normalizadas[mapeado].map(mapeamento["Grupo"]).to_numpy()
+    hierarquia.loc[mapeado, "Subcategoria"] = normalizadas[mapeado].map(mapeamento["Subcategoria"]).to_numpy()
+    return hierarquia
+
+
+def montar_agregados(dados_mensais, hierarquia):
+    """
+    Soma de Valor em cada nível de NIVEIS e mês. Retorna {nivel: DataFrame} com cada tabela
+    indexada por mês (PeriodIndex, ver periodos.py) e as colunas do nível mais Valor.
+    """
+    base = dados_mensais.join(hierarquia.set_index("Categoria"), on="Categoria")
+    agregados = {}
+    for nivel, colunas in NIVEIS.items():
+        agregados[nivel] = (
+            base.groupby([base.index, *colunas], sort=True)["Valor"].sum()
+            .reset_index(level=colunas)
+        )
+    return agregados
+
+
+# Hierarquia e agregados só são recalculados quando dados.xlsx ou categorias.csv mudam
+registrar("hierarquia_categorias", ["dados_mensais", "categorias.csv"], montar_hierarquia)
+registrar("agregados_categorias", ["dados_mensais", "hierarquia_categorias"], montar_agregados)
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from dependencias import obter, registrar
+from formatacao import registrar_exibicao
+import utils  # registra as planilhas de origem
+
+COLUNAS_COMPRAS = ["Aba", "Fornecedor", "Pedido", "Data", "Valor", "Pagamento", "Tipo", "Status"]
+
+# Cabeçalhos aceitos para cada coluna normalizada, em ordem de preferência.
+# Nas abas de entregues e devoluções o valor do pedido fica numa coluna sem cabeçalho próprio
+# ("PEDIDO.1" / "Unnamed: 4"), por isso esses nomes também são aceitos.
+CABECALHOS_COMPRAS = {
+    "Fornecedor": ["FORNECEDOR"],
+    "Pedido": ["PEDIDO"],
+    "Data": ["DATA EMISSÃO", "EMISSÃO PEDIDO", "EMISSÃO NF", "DATA"],
+    "Valor": ["VL. TOTAL", "VALOR", "PEDIDO.1", "UNNAMED: 4"],
+    "Pagamento": ["FORMA DE PAGAMENTO", "PAGAMENTO"],
+    "Tipo": ["TIPO"],
+    "Status": ["STATUS", "APROVAÇÃO PAULO"],
+}
+
+
+def normalizar_texto(serie):
+    """Caixa alta, sem acentos e sem espaços nas pontas, de forma vetorizada."""
+    return (
+        serie.astype("string")
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.upper()
+        .str.strip()
+    )
+
+
+def converter_datas(valores):
+    """
+    Converte uma coluna de datas que pode misturar datas e números seriais do Excel (ex.: 45783).
+    """
+    numeros = pd.to_numeric(valores, errors="coerce")
+    seriais = pd.to_datetime(numeros, unit="D", origin="1899-12-30", errors="coerce")
+    datas = pd.to_datetime(valores.where(numeros.isna()), errors="coerce")
+    return datas.fillna(seriais).astype("datetime64[ns]")
+
+
+def _coluna(df, nome):
+    cabecalhos = {str(c).strip().upper(): c for c in df.columns}
+    for candidato in CABECALHOS_COMPRAS[nome]:
+        if candidato in cabecalhos:
+            return df[cabecalhos[candidato]]
+    return pd.Series(np.nan, index=df.index, dtype="object")
+
+
+def montar_compras(planilhas):
+    """
+    Normaliza todas as abas da planilha de compras em uma única tabela com as colunas:
+    Aba, Fornecedor, Pedido, Data, Valor, Pagamento, Tipo, Status.
+
+    Abas sem coluna de status recebem o próprio nome da aba como status
+    (ex.: "PEDIDOS ENTREGUES" -> "ENTREGUES"). As colunas de texto usam dtype categórico,
+    e a tabela é ordenada por data para permitir buscas por intervalo com searchsorted.
+    """
+    partes = []
+    for aba, df in planilhas.items():
+        df = df[_coluna(df, "Fornecedor").notna()]
+        status_padrao = str(aba).strip().upper().removeprefix("PEDIDOS ").strip()
+        parte = pd.DataFrame({
+            "Aba": str(aba).strip(),
+            "Fornecedor": _coluna(df, "Fornecedor").astype("string").str.strip(),
+            "Pedido": pd.to_numeric(_coluna(df, "Pedido"), errors="coerce").astype("Int64"),
+            "Data": converter_datas(_coluna(df, "Data")),
+            "Valor": pd.to_numeric(_coluna(df, "Valor"), errors="coerce").astype("float64"),
+            "Pagamento": _coluna(df, "Pagamento").astype("string").str.strip(),
+            "Tipo": _coluna(df, "Tipo").astype("string").str.strip(),
+            "Status": _coluna(df, "Status").astype("string").str.strip().fillna(status_padrao),
+        })
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_COMPRAS)
+
+    compras = pd.concat(partes, ignore_index=True)
+    for coluna in ["Aba", "Fornecedor", "Pagamento", "Tipo", "Status"]:
+        compras[coluna] = compras[coluna].astype("category")
+    return compras.sort_values("Data", kind="stable", na_position="last", ignore_index=True)[COLUNAS_COMPRAS]
+
+
+def resumir_compras(compras):
+    """Quantidade de pedidos e valor total por aba e status."""
+    return (
+        compras.groupby(["Aba", "Status"], observed=True)
+        .agg(Quantidade=("Valor", "size"), Valor=("Valor", "sum"))
+        .reset_index()
+    )
+
+
+registrar("compras", ["planilhas_compras"], montar_compras)
+registrar("resumo_compras", ["compras"], resumir_compras)
+registrar_exibicao("compras", moeda=["Valor"], datas=["Data"])
+
+
+def carregar_compras():
+    """
+    Tabela normalizada de compras e o resumo por aba/status, recalculados só quando
+    compras.xlsx muda.
+    """
+    return obter("compras"), obter("resumo_compras")
+
+
+def filtrar_compras(compras, abas=None, status=None, busca="", inicio=None, fim=None):
+    """
+    Seleciona as linhas de compras que atendem aos filtros e retorna suas posições (array NumPy).
+
+    Os filtros de aba e status comparam os códigos das categorias, e a busca por fornecedor é
+    feita apenas sobre a lista de fornecedores distintos (sem acentos e sem diferenciar
+    maiúsculas). O intervalo de datas é resolvido por busca binária sobre a coluna Data ordenada.
+    """
+    selecionadas = np.ones(len(compras), dtype=bool)
+
+    for coluna, valores in (("Aba", abas), ("Status", status)):
+        if valores:
+            codigos = compras[coluna].cat.categories.get_indexer(list(valores))
+            selecionadas &= np.isin(compras[coluna].cat.codes.to_numpy(), codigos[codigos >= 0])
+
+    if busca:
+        fornecedores = compras["Fornecedor"].cat.categories.to_series()
+        termo = normalizar_texto(pd.Series([busca])).iloc[0]
+        encontrados = np.flatnonzero(normalizar_texto(fornecedores).str.contains(termo, regex=False).to_numpy())
+        selecionadas &= np.isin(compras["Fornecedor"].cat.codes.to_numpy(), encontrados)
+
+    if inicio is not None or fim is not None:
+        datas = compras["Data"].to_numpy()
+        validas = int((~np.isnat(datas)).sum())
+        primeiro = np.searchsorted(datas[:validas], np.datetime64(pd.Timestamp(inicio)), "left") if inicio is not None else 0
+        ultimo = np.searchsorted(
+            datas[:validas], np.datetime64(pd.Timestamp(fim) + pd.Timedelta(days=1)), "left"
+        ) if fim is not None else validas
+        no_intervalo = np.zeros(len(compras), dtype=bool)
+        no_intervalo[primeiro:ultimo] = True
+        selecionadas &= no_intervalo
+
+    return np.flatnonzero(selecionadas)
+
+
+def pagina_compras(compras, posicoes, pagina, tamanho):
+    """Retorna apenas as linhas da página solicitada (1 = primeira) dentre as posições filtradas."""
+    inicio = (pagina - 1) * tamanho
+    return compras.iloc[posicoes[inicio:inicio + tamanho]]
@@ -0,0 +1,179 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dependencias import obter, registrar
+from formatacao import registrar_exibicao
+from utils import numero_mes
+
+# Percentual do faturamento líquido liberado para compras no mês
+PERCENTUAL_LIMITE_COMPRA = 0.40
+
+# Grade padrão do simulador de limite de compra:
+#   - percentuais do faturamento líquido liberados para compra;
+#   - multiplicador sobre descontos + perdas registrados (1 = como está na planilha);
+#   - fração das compras em trânsito tratada como já comprometida.
+PERCENTUAIS_SIMULACAO = tuple(round(float(p), 2) for p in np.arange(0.20, 0.605, 0.05))
+FATORES_PERDAS_SIMULACAO = tuple(round(float(f), 2) for f in np.arange(0.0, 2.01, 0.25))
+FATORES_TRANSITO_SIMULACAO = (0.0, 0.25, 0.5, 0.75, 1.0)
+GRADE_SIMULACAO = (PERCENTUAIS_SIMULACAO, FATORES_PERDAS_SIMULACAO, FATORES_TRANSITO_SIMULACAO)
+
+
+def converter_valores(valores):
+    """
+    Converte uma coluna da Conta Corrente para float de forma vetorizada.
+    Números são mantidos; textos só são convertidos quando estão no formato monetário
+    ("R$ 1.234,56"). Qualquer outro conteúdo vira NaN.
+    """
+    if pd.api.types.is_numeric_dtype(valores):
+        return valores.astype("float64")
+
+    eh_texto = valores.map(type).eq(str)
+    numericos = pd.to_numeric(valores.where(~eh_texto), errors="coerce")
+    textos = valores.where(eh_texto).astype("string").str.strip()
+    monetarios = textos.str.startswith("R$", na=False)
+    convertidos = pd.to_numeric(
+        textos[monetarios]
+        .str.replace("R$", "", regex=False)
+        .str.strip()
+        .str.replace(".", "", regex=False)
+        .str.replace(",", ".", regex=False),
+        errors="coerce",
+    )
+    return numericos.where(~monetarios, convertidos).astype("float64")
+
+
+def montar_lancamentos_conta_corrente(planilhas):
+    """
+    Junta todas as abas de meses da Conta Corrente em uma tabela longa com as colunas:
+    Aba, Mes, Descricao, Valor. Abas cujo nome não é um mês são ignoradas.
+    """
+    partes = []
+    for aba, df in planilhas.items():
+        mes = numero_mes(aba)
+        if mes is None or df.shape[1] < 2:
+            continue
+        parte = df.iloc[:, :2].copy()
+        parte.columns = ["Descricao", "Valor"]
+        parte["Descricao"] = parte["Descricao"].astype(str).str.upper().str.strip()
+        parte["Valor"] = converter_valores(parte["Valor"])
+        parte.insert(0, "Mes", mes)
+        parte.insert(0, "Aba", aba)
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=["Aba", "Mes", "Descricao", "Valor"])
+    return pd.concat(partes, ignore_index=True).sort_values(["Mes"], kind="stable", ignore_index=True)
+
+
+def montar_serie_conta_corrente(lancamentos):
+    """
+    Monta a série mensal da Conta Corrente: uma linha por aba/mês (índice = nome da aba,
+    em ordem cronológica) e uma coluna por indicador (FATURAMENTO LOJAS, DESCONTO LOJAS,
+    COMPRAS EM TRÂNSITO, ...). Acrescenta os indicadores calculados usados pelas páginas:
+    FATURAMENTO BRUTO, FATURAMENTO LÍQUIDO, LIMITE CALCULADO e TOTAL COMPRAS REGISTRADAS.
+    Indicadores ausentes em um mês ficam com 0.
+    """
+    validos = lancamentos[lancamentos["Descricao"].ne("NAN") & lancamentos["Valor"].notna()]
+    ordem = lancamentos.drop_duplicates("Aba")[["Aba", "Mes"]].sort_values("Mes")["Aba"]
+    serie = (
+        validos.pivot_table(index="Aba", columns="Descricao", values="Valor", aggfunc="first")
+        .reindex(ordem)
+        .fillna(0.0)
+    )
+    serie.columns.name = None
+
+    def coluna(nome):
+        return serie[nome] if nome in serie.columns else 0.0
+
+    serie["FATURAMENTO BRUTO"] = coluna("FATURAMENTO LOJAS") + coluna("FATURAMENTO DISPLAY/ATACADO")
+    serie["FATURAMENTO LÍQUIDO"] = serie["FATURAMENTO BRUTO"] - coluna("DESCONTO LOJAS") - coluna("PERDAS LOJAS")
+    serie["LIMITE CALCULADO"] = serie["FATURAMENTO LÍQUIDO"] * PERCENTUAL_LIMITE_COMPRA
+    serie["TOTAL COMPRAS REGISTRADAS"] = (
+        coluna("TOTAL COMPRAS NOTA FISCAL") + coluna("TOTAL COMPRAS NOTA ESPECIAL")
+    )
+    return serie
+
+
+registrar("lancamentos_conta_corrente", ["planilhas_conta_corrente"], montar_lancamentos_conta_corrente)
+registrar_exibicao("lancamentos_conta_corrente", moeda=["Valor"])
+registrar("serie_conta_corrente", ["lancamentos_conta_corrente"], montar_serie_conta_corrente)
+# A mesma série com o mês como coluna, para exportação e para a API
+registrar(
+    "indicadores_conta_corrente", ["serie_conta_corrente"],
+    lambda serie: serie.rename_axis("Mês").reset_index(),
+)
+
+
+def carregar_conta_corrente():
+    """
+    Todas as abas de conta_corrente.xlsx, lidas uma única vez por versão do arquivo.
+    Retorna (lancamentos, serie): a tabela longa de lançamentos e a série mensal de indicadores.
+    Se o arquivo não existir, ambas vêm vazias.
+    """
+    return obter("lancamentos_conta_corrente"), obter("serie_conta_corrente")
+
+
+def simular_limites(serie, percentuais, fatores_perdas, fatores_transito):
+    """
+    Avalia todos os cenários da grade para todos os meses de uma vez (broadcast NumPy):
+
+        limite = percentual x (faturamento bruto - fator_perdas x (descontos + perdas))
+        folga  = limite - (compras registradas + fator_transito x compras em trânsito)
+
+    Retorna um array com formato (meses, percentuais, fatores_perdas, fatores_transito);
+    valores positivos são folga para comprar, negativos são compras acima do limite.
+    """
+    def coluna(nome):
+        return serie[nome].to_numpy(dtype="float64") if nome in serie.columns else np.zeros(len(serie))
+
+    bruto = serie["FATURAMENTO BRUTO"].to_numpy(dtype="float64")
+    redutores = coluna("DESCONTO LOJAS") + coluna("PERDAS LOJAS")
+    registradas = serie["TOTAL COMPRAS REGISTRADAS"].to_numpy(dtype="float64")
+    transito = coluna("COMPRAS EM TRÂNSITO")
+
+    percentuais = np.asarray(percentuais, dtype="float64")[None, :, None, None]
+    fatores_perdas = np.asarray(fatores_perdas, dtype="float64")[None, None, :, None]
+    fatores_transito = np.asarray(fatores_transito, dtype="float64")[None, None, None, :]
+
+    liquido = bruto[:, None, None, None] - fatores_perdas * redutores[:, None, None, None]
+    comprometido = registradas[:, None, None, None] + fatores_transito * transito[:, None, None, None]
+    return percentuais * liquido - comprometido
+
+
+def _simular_grade(serie, grade):
+    folga = simular_limites(serie, *grade)
+    folga.flags.writeable = False  # compartilhado entre sessões
+    return folga
+
+
+# Cada grade simulada é um nó do grafo: calculada uma vez por versão de conta_corrente.xlsx e
+# empresa, dentro do limite de memória do cache. A grade padrão é registrada de saída; as
+# demais, na primeira vez em que são pedidas.
+_nos_simulacao = {}
+_registro_simulacao = threading.Lock()
+
+
+def _no_simulacao(grade):
+    with _registro_simulacao:
+        nome = _nos_simulacao.get(grade)
+        if nome is None:
+            nome = "simulacao_limites" if grade == GRADE_SIMULACAO else f"simulacao_limites_{len(_nos_simulacao)}"
+            registrar(nome, ["serie_conta_corrente"], lambda serie: _simular_grade(serie, grade))
+            _nos_simulacao[grade] = nome
+    return nome
+
+
+_no_simulacao(GRADE_SIMULACAO)
+
+
+def simulacao_limites(percentuais=PERCENTUAIS_SIMULACAO, fatores_perdas=FATORES_PERDAS_SIMULACAO,
+                      fatores_transito=FATORES_TRANSITO_SIMULACAO):
+    """
+    Simulação da grade inteira sobre a série atual da Conta Corrente (ver simular_limites).
+    Cada grade é calculada uma vez por versão de conta_corrente.xlsx; mover os controles da
+    página só seleciona fatias deste resultado. O array retornado é somente leitura.
+    """
+    grade = (tuple(percentuais), tuple(fatores_perdas), tuple(fatores_transito))
+    return obter(_no_simulacao(grade))
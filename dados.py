@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dependencias import registrar
+from formatacao import registrar_exibicao
+from periodos import indexar_por_mes
+import utils  # registra as planilhas de origem
+
+
+def load_data_from_excel_layout_vertical(df_excel):
+    """
+    Converte a aba de dados.xlsx com layout vertical, já lida sem cabeçalho (nó
+    planilhas_dados), para o formato longo. O arquivo não é lido aqui.
+    Espera que:
+      - A célula A2 contenha "PERÍODO" e as células à direita (B2, C2, etc) contenham os períodos no formato "MÊS.ANO"
+      - A partir da linha 3, a coluna A contém os nomes das categorias e as colunas seguintes possuem os valores para cada período.
+    
+    Retorna um DataFrame no formato longo com as colunas: Data, Categoria, Valor, Tipo.
+    """
+    try:
+        # Obtém os períodos (linha 2 – índice 1) a partir da coluna B em diante
+        raw_periods = df_excel.iloc[1, 1:].tolist()
+        
+        # Mapeamento dos nomes dos meses em português para números
+        month_map = {
+            "JANEIRO": "01",
+            "FEVEREIRO": "02",
+            "MARÇO": "03",
+            "ABRIL": "04",
+            "MAIO": "05",
+            "JUNHO": "06",
+            "JULHO": "07",
+            "AGOSTO": "08",
+            "SETEMBRO": "09",
+            "OUTUBRO": "10",
+            "NOVEMBRO": "11",
+            "DEZEMBRO": "12"
+        }
+        
+        # Processa os períodos para o formato "YYYY-MM"
+        processed_periods = []
+        for p in raw_periods:
+            p_str = str(p).strip()
+            if p_str.lower() == "nan" or p_str == "":
+                processed_periods.append("")
+            else:
+                parts = p_str.split(".")
+                if len(parts) == 2:
+                    month_name = parts[0].strip().upper()
+                    year = parts[1].strip()
+                    month_num = month_map.get(month_name, "00")
+                    period_standard = f"{year}-{month_num}"
+                    processed_periods.append(period_standard)
+                else:
+                    processed_periods.append(p_str)
+        
+        # Reordena os períodos cronologicamente
+        period_index_pairs = [(i, p) for i, p in enumerate(processed_periods) if p != ""]
+        period_index_pairs.sort(key=lambda x: x[1])
+        sorted_indices = [i for i, p in period_index_pairs]
+        sorted_periods = [p for i, p in period_index_pairs]
+        
+        # Seleciona os valores das transações a partir da linha 3
+        data_values = df_excel.iloc[2:, 1:]
+        data_values = data_values.iloc[:, sorted_indices]
+        
+        # Define as categorias a partir da coluna A (a partir da linha 3)
+        categories = df_excel.iloc[2:, 0].tolist()
+        
+        records = []
+        for i, cat in enumerate(categories):
+            category_str = str(cat).strip()
+            # Ignora as categorias que representam totais
+            if category_str.upper() in {"RECEITAS", "DESPESAS"}:
+                continue
+            for j, period in enumerate(sorted_periods):
+                if period == "":
+                    continue
+                value = data_values.iloc[i, j]
+                if pd.notnull(value):
+                    valor = float(value)
+                    if valor < 0:
+                        tipo = "Despesa"
+                        valor = abs(valor)
+                    else:
+                        tipo = "Receita"
+                    records.append({
+                        "Data": period,  # Formato "YYYY-MM"
+                        "Categoria": category_str,
+                        "Valor": valor,
+                        "Tipo": tipo
+                    })
+        df_imported = pd.DataFrame(records)
+        return df_imported
+
+    except Exception as e:
+        st.error("Erro ao carregar o arquivo Excel: " + str(e))
+        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
+
+
+def _montar_dados_mensais(planilhas):
+    if not planilhas:
+        # Empresa sem dados.xlsx: não lê o arquivo padrão no lugar
+        return indexar_por_mes(pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"]), "Data")
+    return indexar_por_mes(load_data_from_excel_layout_vertical(next(iter(planilhas.values()))), "Data")
+
+
+# Dados do dashboard no formato longo, indexados por mês, recalculados só quando dados.xlsx muda
+registrar("dados_mensais", ["planilhas_dados"], _montar_dados_mensais)
+
+
+def montar_cubo_mensal(dados_mensais):
+    """Valores por tipo e categoria (linhas) e mês "YYYY-MM" (colunas)."""
+    cubo = dados_mensais.pivot_table(
+        index=["Tipo", "Categoria"], columns=dados_mensais.index.astype(str), values="Valor", aggfunc="sum"
+    ).reset_index()
+    cubo.columns.name = None
+    return cubo
+
+
+registrar("cubo_mensal", ["dados_mensais"], montar_cubo_mensal)
+
+
+NOMES_MESES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+]
+# Granularidades dos gráficos de longo prazo, da mais fina para a mais grossa
+GRANULARIDADES = ["Mês", "Trimestre", "Ano"]
+
+
+def montar_lucro_por_periodo(dados_mensais):
+    """
+    Lucro (receitas menos despesas) já somado por mês, trimestre e ano, para os gráficos de
+    histórico longo. Retorna {granularidade: tabela}, cada tabela com as colunas Ano,
+    Posicao (mês ou trimestre dentro do ano; o próprio ano na anual), Rotulo e Lucro.
+    """
+    sinal = np.where(dados_mensais["Tipo"] == "Receita", 1.0, -1.0)
+    lucro = (dados_mensais["Valor"] * sinal).groupby(level="Periodo").sum()
+
+    mensal = pd.DataFrame({"Ano": lucro.index.year, "Posicao": lucro.index.month, "Lucro": lucro.to_numpy()})
+    mensal["Rotulo"] = np.asarray(NOMES_MESES, dtype=object)[mensal["Posicao"].to_numpy() - 1]
+
+    trimestres = lucro.groupby(lucro.index.asfreq("Q")).sum()
+    trimestral = pd.DataFrame({
+        "Ano": trimestres.index.year, "Posicao": trimestres.index.quarter, "Lucro": trimestres.to_numpy(),
+    })
+    trimestral["Rotulo"] = "T" + trimestral["Posicao"].astype(str)
+
+    anos = lucro.groupby(lucro.index.year).sum()
+    anual = pd.DataFrame({"Ano": anos.index, "Posicao": anos.index, "Lucro": anos.to_numpy()})
+    anual["Rotulo"] = anual["Ano"].astype(str)
+
+    return {"Mês": mensal, "Trimestre": trimestral, "Ano": anual}
+
+
+# Somas por mês/trimestre/ano recalculadas só quando dados.xlsx muda
+registrar("lucro_por_periodo", ["dados_mensais"], montar_lucro_por_periodo)
+registrar_exibicao("dados_mensais", moeda=["Valor"])
@@ -0,0 +1,207 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from empresas import caminho_arquivo, empresa_atual
+
+# Grafo de dependências entre as planilhas de origem e os dados derivados delas.
+#
+# Cada nó é uma fonte (arquivo) ou um nó derivado, calculado a partir dos valores dos nós de que
+# depende. A versão de um nó derivado é a combinação das versões das fontes acima dele; quando
+# uma planilha é substituída, apenas os nós que dependem dela são recalculados na próxima leitura.
+#
+# Cada empresa (ver empresas.py) tem as próprias planilhas, então os valores são guardados por
+# empresa. A memória ocupada por todas as empresas é limitada a MEMORIA_MAXIMA_MB: ao passar do
+# limite, os dados das empresas usadas há mais tempo são descartados (e relidos se voltarem a
+# ser usados).
+#
+# Os valores ficam em memória e são compartilhados entre as sessões: trate-os como somente
+# leitura (faça uma cópia antes de alterar).
+
+MEMORIA_MAXIMA_MB = float(os.environ.get("FIN_MEMORIA_MB", 512))
+
+_nos = {}
+_registro = threading.Lock()
+# Última vez que cada empresa foi consultada, para descartar as usadas há mais tempo
+_uso_empresas = {}
+
+
+def versao_arquivo(caminho):
+    """
+    Identifica a versão atual de um arquivo pela data de modificação e pelo tamanho.
+    Retorna None se o arquivo não existir.
+    """
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return f"{info.st_mtime_ns}-{info.st_size}"
+
+
+def tamanho_em_memoria(valor):
+    """Estimativa, em bytes, da memória ocupada por um valor calculado (tabelas, arrays, dicionários)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, dict):
+        return sum(tamanho_em_memoria(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamanho_em_memoria(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def registrar_fonte(nome, arquivo=None):
+    """
+    Registra um arquivo de origem, relativo à pasta de cada empresa (por padrão, o próprio
+    `nome`). O valor de uma fonte é o caminho do arquivo na pasta da empresa.
+    """
+    with _registro:
+        _nos[nome] = {"tipo": "fonte", "arquivo": arquivo or nome, "depende": (), "empresas": {}}
+
+
+def registrar(nome, depende, funcao):
+    """
+    Registra um nó derivado: `funcao` recebe os valores de `depende`, na mesma ordem.
+    Registrar de novo um nó existente troca a função, mas mantém os valores já calculados.
+    """
+    for dependencia in depende:
+        if dependencia not in _nos:
+            raise KeyError(f"Dependência desconhecida para '{nome}': '{dependencia}'")
+    with _registro:
+        anterior = _nos.get(nome, {})
+        _nos[nome] = {
+            "tipo": "derivado",
+            "depende": tuple(depende),
+            "funcao": funcao,
+            "empresas": anterior.get("empresas", {}),
+        }
+
+
+def _estado(nome, empresa):
+    """Valor em cache de um nó para uma empresa (criado vazio na primeira consulta)."""
+    estados = _nos[nome]["empresas"]
+    estado = estados.get(empresa)
+    if estado is None:
+        with _registro:
+            estado = estados.setdefault(empresa, {
+                "trava": threading.RLock(), "versao": None, "valor": None,
+                "calculos": 0, "calculado_em": None, "bytes": 0,
+            })
+    return estado
+
+
+def caminho_fonte(nome, empresa=None):
+    """Caminho do arquivo de uma fonte na pasta da empresa (por padrão, a empresa em uso)."""
+    return caminho_arquivo(empresa or empresa_atual(), _nos[nome]["arquivo"])
+
+
+def versao(nome, empresa=None):
+    """
+    Versão atual de um nó para uma empresa (por padrão, a empresa em uso): a versão do arquivo,
+    para fontes, ou a das suas dependências. Empresas diferentes nunca têm a mesma versão.
+    """
+    empresa = empresa or empresa_atual()
+    atual = _nos[nome]
+    if atual["tipo"] == "fonte":
+        return (empresa, versao_arquivo(caminho_fonte(nome, empresa)))
+    return tuple(versao(dependencia, empresa) for dependencia in atual["depende"])
+
+
+def obter(nome, empresa=None):
+    """
+    Retorna o valor de um nó para uma empresa (por padrão, a empresa em uso), recalculando-o
+    (e às dependências desatualizadas) somente se alguma fonte acima dele mudou desde o
+    último cálculo.
+    """
+    empresa = empresa or empresa_atual()
+    _uso_empresas[empresa] = time.monotonic()
+    atual = _nos[nome]
+    if atual["tipo"] == "fonte":
+        return caminho_fonte(nome, empresa)
+
+    estado = _estado(nome, empresa)
+    with estado["trava"]:
+        versao_atual = versao(nome, empresa)
+        if estado["calculos"] == 0 or estado["versao"] != versao_atual:
+            valores = [obter(dependencia, empresa) for dependencia in atual["depende"]]
+            estado["valor"] = atual["funcao"](*valores)
+            estado["versao"] = versao_atual
+            estado["calculos"] += 1
+            estado["calculado_em"] = datetime.now()
+            estado["bytes"] = tamanho_em_memoria(estado["valor"])
+            calculado = True
+        else:
+            calculado = False
+        valor = estado["valor"]
+
+    if calculado:
+        _liberar_memoria(manter=empresa)
+    return valor
+
+
+def memoria_por_empresa():
+    """Bytes ocupados pelos valores em cache de cada empresa."""
+    totais = {}
+    for dados in _nos.values():
+        for empresa, estado in list(dados["empresas"].items()):
+            totais[empresa] = totais.get(empresa, 0) + estado["bytes"]
+    return totais
+
+
+def descartar_empresa(empresa):
+    """Descarta os valores em cache de uma empresa; serão recalculados na próxima leitura."""
+    for dados in _nos.values():
+        estado = dados["empresas"].get(empresa)
+        if estado is None:
+            continue
+        with estado["trava"]:
+            estado.update(versao=None, valor=None, calculos=0, calculado_em=None, bytes=0)
+
+
+def _liberar_memoria(manter):
+    """Descarta as empresas usadas há mais tempo até a memória total caber no limite."""
+    limite = MEMORIA_MAXIMA_MB * 1024 * 1024
+    totais = memoria_por_empresa()
+    total = sum(totais.values())
+    candidatas = sorted(
+        (empresa for empresa, ocupado in totais.items() if empresa != manter and ocupado > 0),
+        key=lambda empresa: _uso_empresas.get(empresa, 0),
+    )
+    for empresa in candidatas:
+        if total <= limite:
+            break
+        descartar_empresa(empresa)
+        total -= totais[empresa]
+
+
+def descrever(empresa=None):
+    """
+    Situação de cada nó do grafo para uma empresa (por padrão, a empresa em uso), para
+    depuração: tipo, dependências, se está atualizado, quantas vezes foi calculado, quando e
+    quanta memória ocupa.
+    """
+    empresa = empresa or empresa_atual()
+    linhas = []
+    for nome, dados in _nos.items():
+        estado = dados["empresas"].get(empresa, {})
+        calculos = estado.get("calculos", 0)
+        atualizado = dados["tipo"] == "fonte" or (calculos > 0 and estado["versao"] == versao(nome, empresa))
+        linhas.append({
+            "No": nome,
+            "Tipo": dados["tipo"],
+            "Depende de": ", ".join(dados["depende"]),
+            "Arquivo": caminho_fonte(nome, empresa) if dados["tipo"] == "fonte" else "",
+            "Atualizado": atualizado,
+            "Calculos": calculos,
+            "Calculado em": estado.get("calculado_em"),
+            "Bytes": estado.get("bytes", 0),
+        })
+    return pd.DataFrame(linhas)
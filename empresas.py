@@ -0,0 +1,120 @@
+import os
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from snapshots import caminho_manifesto, formatar_momento, listar_momentos
+
+# Pasta raiz das planilhas (pode ser trocada pela variável de ambiente FIN_DATA_DIR).
+# Cada empresa tem o próprio conjunto de planilhas em uma subpasta (data/spezia/, data/amd/, ...);
+# planilhas soltas na raiz formam a empresa padrão.
+BASE_DATA_DIR = os.environ.get("FIN_DATA_DIR", "data")
+EMPRESA_PADRAO = "principal"
+
+# Arquivos que identificam uma pasta como conjunto de planilhas de uma empresa
+ARQUIVOS_EMPRESA = ["dados.xlsx", "relatorio_vendas.xlsx", "conta_corrente.xlsx", "compras.xlsx"]
+
+# Uma sessão pode ver as planilhas como estavam num momento passado (ver snapshots.py).
+# Nesse caso a empresa em uso é "empresa@momento", e os dados desse momento ficam em cache
+# separados dos atuais.
+SEPARADOR_MOMENTO = "@"
+
+
+def _tem_planilhas(diretorio):
+    return any(os.path.exists(os.path.join(diretorio, arquivo)) for arquivo in ARQUIVOS_EMPRESA)
+
+
+def listar_empresas():
+    """Empresas disponíveis: a padrão (planilhas na raiz) e cada subpasta com planilhas."""
+    empresas = [EMPRESA_PADRAO] if _tem_planilhas(BASE_DATA_DIR) else []
+    if os.path.isdir(BASE_DATA_DIR):
+        for nome in sorted(os.listdir(BASE_DATA_DIR)):
+            caminho = os.path.join(BASE_DATA_DIR, nome)
+            if nome != EMPRESA_PADRAO and not nome.startswith(".") and os.path.isdir(caminho) and _tem_planilhas(caminho):
+                empresas.append(nome)
+    return empresas or [EMPRESA_PADRAO]
+
+
+def separar_momento(empresa):
+    """Separa "empresa@momento" em (empresa, momento); momento é None para os dados atuais."""
+    nome, _, momento = empresa.partition(SEPARADOR_MOMENTO)
+    return nome, momento or None
+
+
+def diretorio_empresa(empresa):
+    """Pasta com as planilhas de uma empresa."""
+    empresa, _ = separar_momento(empresa)
+    if empresa == EMPRESA_PADRAO:
+        return BASE_DATA_DIR
+    return os.path.join(BASE_DATA_DIR, empresa)
+
+
+def caminho_arquivo(empresa, arquivo):
+    """
+    Caminho de um arquivo da empresa. Para "empresa@momento", as planilhas .xlsx apontam para
+    o snapshot daquele momento; os demais arquivos continuam sendo os atuais.
+    """
+    diretorio = diretorio_empresa(empresa)
+    _, momento = separar_momento(empresa)
+    if momento and arquivo.endswith(".xlsx"):
+        return caminho_manifesto(diretorio, arquivo, momento)
+    return os.path.join(diretorio, arquivo)
+
+
+def empresa_atual():
+    """
+    Empresa em uso: a escolhida na sessão do Streamlit (com o momento escolhido, se houver),
+    senão a padrão (ex.: scripts e threads fora de uma sessão).
+    """
+    if get_script_run_ctx() is not None:
+        empresa = st.session_state.get("empresa", EMPRESA_PADRAO)
+        momento = st.session_state.get("momento")
+        return f"{empresa}{SEPARADOR_MOMENTO}{momento}" if momento else empresa
+    return EMPRESA_PADRAO
+
+
+def selecionar_empresa():
+    """
+    Seletores da empresa e do momento da sessão. O de empresa só aparece quando há mais de uma;
+    o de momento, quando há snapshots de mais de um momento. As escolhas ficam em
+    st.session_state["empresa"] e st.session_state["momento"] (None = dados atuais) e valem
+    para todas as páginas.
+    """
+    empresas = listar_empresas()
+    if st.session_state.get("empresa") not in empresas:
+        st.session_state["empresa"] = empresas[0]
+    momentos = listar_momentos(diretorio_empresa(st.session_state["empresa"]))
+    if st.session_state.get("momento") not in momentos:
+        st.session_state["momento"] = None
+    if len(empresas) < 2 and len(momentos) < 2:
+        return empresa_atual()
+
+    def trocar_empresa():
+        st.session_state["empresa"] = st.session_state["_seletor_empresa"]
+        st.session_state["momento"] = None
+
+    def trocar_momento():
+        st.session_state["momento"] = st.session_state["_seletor_momento"]
+
+    col_empresa, col_momento = st.columns(2)
+    if len(empresas) > 1:
+        col_empresa.selectbox(
+            "🏢 Empresa",
+            empresas,
+            index=empresas.index(st.session_state["empresa"]),
+            key="_seletor_empresa",
+            on_change=trocar_empresa,
+        )
+    if len(momentos) > 1:
+        opcoes = [None] + momentos
+        col_momento.selectbox(
+            "🕓 Planilhas de",
+            opcoes,
+            index=opcoes.index(st.session_state["momento"]),
+            format_func=lambda momento: "Agora (atuais)" if momento is None else formatar_momento(momento),
+            key="_seletor_momento",
+            on_change=trocar_momento,
+        )
+    if st.session_state["momento"]:
+        st.info(f"📸 Exibindo as planilhas como estavam em {formatar_momento(st.session_state['momento'])}.")
+    return empresa_atual()
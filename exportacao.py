@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import compras  # registra o nó resumo_compras
+import conta_corrente  # registra o nó indicadores_conta_corrente
+import dados  # registra o nó cubo_mensal
+import vendas  # registra o nó performance_lojas
+from dependencias import obter, registrar
+
+# Tabelas agregadas do relatório completo (aba -> nó do grafo de dependências); o relatório é
+# recalculado só quando algum desses nós muda. As mesmas tabelas são servidas pela API
+# (ver api.py).
+AGREGADOS = {
+    "Cubo Mensal": "cubo_mensal",
+    "Conta Corrente": "indicadores_conta_corrente",
+    "Performance Lojas": "performance_lojas",
+    "Compras por Status": "resumo_compras",
+}
+
+
+def _valor_celula(valor):
+    """Converte um valor do pandas/NumPy para um tipo que o openpyxl sabe gravar."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if isinstance(valor, pd.Period):
+        return str(valor)
+    return valor
+
+
+def escrever_planilhas(abas, destino):
+    """
+    Grava um dicionário {nome_da_aba: DataFrame} em `destino` (caminho ou arquivo binário)
+    usando o modo somente-escrita do openpyxl, que grava linha a linha sem manter a planilha
+    inteira em memória.
+    """
+    workbook = Workbook(write_only=True)
+    for nome, df in abas.items():
+        planilha = workbook.create_sheet(title=str(nome)[:31])
+        planilha.append([str(coluna) for coluna in df.columns])
+        for linha in df.itertuples(index=False, name=None):
+            planilha.append([_valor_celula(valor) for valor in linha])
+    workbook.save(destino)
+
+
+def _em_bytes(escrever):
+    """Executa `escrever(buffer)` num buffer em memória e retorna o conteúdo gravado."""
+    buffer = io.BytesIO()
+    escrever(buffer)
+    return buffer.getvalue()
+
+
+def montar_relatorio_completo(*tabelas):
+    """
+    Reúne as tabelas do relatório completo, uma por aba (ver AGREGADOS):
+      - Cubo Mensal: valores por tipo e categoria (linhas) e mês (colunas);
+      - Conta Corrente: indicadores de todos os meses;
+      - Performance Lojas: atingimento da meta de cada loja em cada mês;
+      - Compras por Status: quantidade e valor por aba e status.
+    """
+    return dict(zip(AGREGADOS, tabelas))
+
+
+# Arquivos para download, em bytes. Como nós do grafo, são gerados só quando pedidos (os botões
+# de download do Inicio recebem funções, executadas no clique) e guardados por versão dos dados,
+# dentro do limite de memória do cache.
+registrar(
+    "exportacao_csv",
+    ["dados_mensais"],
+    lambda dados_mensais: dados_mensais.reset_index(drop=True).to_csv(index=False).encode("utf-8"),
+)
+registrar(
+    "exportacao_excel",
+    ["dados_mensais"],
+    lambda dados_mensais: _em_bytes(
+        lambda buffer: escrever_planilhas({"Sheet1": dados_mensais.reset_index(drop=True)}, buffer)
+    ),
+)
+registrar(
+    "relatorio_completo",
+    list(AGREGADOS.values()),
+    lambda *tabelas: _em_bytes(lambda buffer: escrever_planilhas(montar_relatorio_completo(*tabelas), buffer)),
+)
+
+
+def gerar_relatorio_completo(empresa=None):
+    """Retorna o conteúdo do arquivo .xlsx do relatório completo de uma empresa, em bytes."""
+    return obter("relatorio_completo", empresa)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from dependencias import registrar
+
+# Formatação dos valores para exibição no padrão brasileiro (R$ 1.234.567,89).
+#
+# As tabelas enviadas ao st.dataframe mantêm os números e as datas (a ordenação pelo cabeçalho
+# usa os valores); tabela_formatada() só troca a exibição. Formatar muitas células custa tempo
+# a cada interação: para as tabelas grandes, registrar_exibicao() guarda no grafo de
+# dependências as colunas de texto já formatadas, recalculadas só quando a planilha muda.
+
+PREFIXO_MOEDA = "R$ "
+# Separadores (decimal, milhar) dos números nos gráficos do Plotly
+SEPARADORES_PLOTLY = ",."
+
+
+def _textos(inteiros):
+    """Textos de uma Series de inteiros, convertidos pelo Arrow (sem passar por objetos Python)."""
+    return inteiros.astype("int64[pyarrow]").astype("str")
+
+
+def _agrupar_milhares(inteiros):
+    """Textos de uma Series de inteiros não negativos com ponto a cada três dígitos."""
+    restantes = inteiros
+    grupos = pd.Series("", index=inteiros.index, dtype="str")
+    # Um passo por grupo de milhar do maior número (no máximo seis para int64); somar 1000 e
+    # descartar o primeiro dígito completa o grupo com zeros à esquerda
+    while restantes.ge(1000).any():
+        acima = restantes.ge(1000)
+        grupo = "." + _textos(restantes.mod(1000).add(1000)).str[1:]
+        grupos = grupos.where(~acima, grupo + grupos)
+        restantes = restantes.where(~acima, restantes.floordiv(1000))
+    return _textos(restantes) + grupos
+
+
+def formatar_moeda(valores, na_rep="-"):
+    """
+    Formata valores em reais: 1234567.89 -> 'R$ 1.234.567,89' e -10.5 -> '-R$ 10,50'.
+    Aceita um número (retorna um texto) ou uma coluna (retorna uma Series de textos com o
+    mesmo índice). Valores vazios ou não numéricos viram `na_rep`.
+    """
+    escalar = np.ndim(valores) == 0
+    serie = pd.Series([valores]) if escalar else pd.Series(valores)
+    numeros = pd.to_numeric(serie, errors="coerce").astype("float64")
+
+    # Parte inteira e centavos em colunas de inteiros; os textos saem das operações .str do
+    # pandas sobre a coluna inteira, sem formatar célula por célula em Python
+    centavos = numeros.abs().mul(100).round()
+    inteiros = centavos.floordiv(100)
+    validos = inteiros.lt(2.0**63)  # vazios, infinitos e valores fora do int64 viram na_rep
+    reais = _agrupar_milhares(inteiros.where(validos, 0).astype("int64"))
+    decimais = _textos(centavos.mod(100).where(validos, 0).astype("int64").add(100)).str[1:]
+    sinal = pd.Series(np.where(numeros.lt(0) & centavos.gt(0), "-", ""), index=serie.index)
+
+    textos = (sinal + PREFIXO_MOEDA + reais + "," + decimais).where(validos, na_rep)
+    if escalar:
+        return textos.iloc[0]
+    return textos.astype("str")
+
+
+def formatar_data(valores, na_rep="-"):
+    """Formata uma coluna de datas como dd/mm/aaaa; datas vazias viram `na_rep`."""
+    datas = pd.to_datetime(pd.Series(valores), errors="coerce")
+    return datas.dt.strftime("%d/%m/%Y").fillna(na_rep)
+
+
+def coluna_rotulo(coluna):
+    """Nome da coluna de textos formatados de `coluna` (ex.: "Valor" -> "ValorTexto")."""
+    return f"{coluna}Texto"
+
+
+def com_rotulos(df, moeda=(), datas=()):
+    """
+    Cópia de `df` com uma coluna de textos formatados ("<coluna>Texto") para cada coluna de
+    moeda e de data indicada. As colunas originais continuam numéricas e datas.
+    """
+    rotulos = {coluna_rotulo(coluna): formatar_moeda(df[coluna]) for coluna in moeda if coluna in df.columns}
+    rotulos.update({coluna_rotulo(coluna): formatar_data(df[coluna]) for coluna in datas if coluna in df.columns})
+    return df.assign(**rotulos)
+
+
+def tabela_formatada(df, moeda=(), datas=()):
+    """
+    Styler de `df` para o st.dataframe. As colunas de moeda e data continuam numéricas e datas,
+    então clicar no cabeçalho ordena pelos valores; só a exibição usa os textos em pt-BR.
+    Aproveita as colunas "<coluna>Texto" já calculadas (ver registrar_exibicao) e calcula as
+    que faltarem; elas não aparecem na tabela.
+    """
+    colunas = [coluna for coluna in (*moeda, *datas) if coluna in df.columns]
+    faltando = [coluna for coluna in colunas if coluna_rotulo(coluna) not in df.columns]
+    rotulos = com_rotulos(df, [c for c in moeda if c in faltando], [c for c in datas if c in faltando])
+
+    estilo = df.drop(columns=[coluna_rotulo(coluna) for coluna in colunas if coluna not in faltando]).style
+    for coluna in colunas:
+        # Cada valor é exibido com o texto já formatado da coluna vetorizada
+        textos = dict(zip(rotulos[coluna], rotulos[coluna_rotulo(coluna)]))
+        estilo = estilo.format(textos.get, subset=[coluna], na_rep="-")
+    return estilo
+
+
+def registrar_exibicao(nome, moeda=(), datas=()):
+    """
+    Registra o nó "<nome>_exibicao": o valor do nó `nome` com as colunas "<coluna>Texto" de
+    moeda e data já formatadas, com o mesmo índice e a mesma ordem das linhas. Serve para
+    tabelas grandes, que assim não reformatam os valores a cada interação (ver
+    tabela_formatada).
+    """
+    registrar(f"{nome}_exibicao", [nome], lambda df: com_rotulos(df, moeda, datas))
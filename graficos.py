@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from formatacao import SEPARADORES_PLOTLY
+
+# Orçamento padrão de cada gráfico enviado ao navegador
+MAX_PONTOS_GRAFICO = 30          # categorias/barras exibidas antes de agrupar o restante em "Outros"
+MAX_BYTES_GRAFICO = 150_000      # tamanho máximo da figura serializada (JSON)
+ROTULO_OUTROS = "Outros"
+MAX_PONTOS_SERIE = 120           # barras de séries temporais antes de trocar de granularidade ou reduzir
+MAX_SERIES_GRAFICO = 10          # linhas de um gráfico antes de agrupar as menores em "Outros"
+
+
+def agregar(df, categoria, valores=None, agregacao="sum"):
+    """
+    Agrega os dados no servidor antes de montar o gráfico.
+    - valores: coluna (ou lista de colunas) a agregar; se None, conta as linhas por categoria
+      em uma coluna "Quantidade".
+    Retorna um DataFrame com a categoria e os valores agregados, do maior para o menor.
+    """
+    if valores is None:
+        agregado = df.groupby(categoria, observed=True).size().rename("Quantidade").reset_index()
+        return agregado.sort_values("Quantidade", ascending=False, ignore_index=True)
+
+    colunas = [valores] if isinstance(valores, str) else list(valores)
+    agregado = df.groupby(categoria, observed=True)[colunas].agg(agregacao).reset_index()
+    return agregado.sort_values(colunas[0], ascending=False, ignore_index=True)
+
+
+def top_n_com_outros(agregado, categoria, valores, n, rotulo=ROTULO_OUTROS):
+    """
+    Mantém as `n` maiores categorias (pela primeira coluna de valores) e soma as demais
+    em uma única linha `rotulo`. Espera dados já agregados (uma linha por categoria).
+    """
+    colunas = [valores] if isinstance(valores, str) else list(valores)
+    if len(agregado) <= n:
+        return agregado
+
+    ordenado = agregado.sort_values(colunas[0], ascending=False)
+    principais = ordenado.iloc[:max(n - 1, 0)]
+    restante = ordenado.iloc[max(n - 1, 0):]
+    outros = pd.DataFrame({categoria: [rotulo], **{c: [restante[c].sum()] for c in colunas}})
+    principais = principais.astype({categoria: "object"})
+    return pd.concat([principais, outros], ignore_index=True)
+
+
+def tamanho_figura(fig):
+    """Tamanho, em bytes, da figura serializada que será enviada ao navegador."""
+    return len(fig.to_json().encode("utf-8"))
+
+
+def figura_com_orcamento(agregado, categoria, valores, construtor,
+                         max_pontos=MAX_PONTOS_GRAFICO, max_bytes=MAX_BYTES_GRAFICO):
+    """
+    Monta uma figura a partir de dados agregados respeitando o orçamento do gráfico.
+
+    Primeiro limita o número de categorias a `max_pontos` (top-N + "Outros"); se a figura
+    serializada ainda passar de `max_bytes`, reduz o número de categorias pela metade até caber.
+    `construtor` recebe o DataFrame reduzido e retorna a figura Plotly.
+    """
+    pontos = max_pontos
+    while True:
+        reduzido = top_n_com_outros(agregado, categoria, valores, pontos)
+        fig = construtor(reduzido)
+        if pontos <= 2 or tamanho_figura(fig) <= max_bytes:
+            return fig
+        pontos = max(2, pontos // 2)
+
+
+def escolher_granularidade(pontos, max_pontos=MAX_PONTOS_SERIE):
+    """
+    Escolhe a granularidade mais fina que cabe no orçamento. `pontos` mapeia cada
+    granularidade, da mais fina para a mais grossa, ao número de pontos que ela geraria;
+    se nenhuma couber, retorna a mais grossa.
+    """
+    for granularidade, quantidade in pontos.items():
+        if quantidade <= max_pontos:
+            return granularidade
+    return granularidade
+
+
+def reduzir_serie(df, valores, max_pontos=MAX_PONTOS_SERIE):
+    """
+    Reduz uma série ordenada a no máximo `max_pontos` linhas preservando a forma: divide as
+    linhas em max_pontos / 2 blocos consecutivos e mantém, de cada bloco, as linhas com o
+    menor e o maior valor de `valores` (picos e vales continuam visíveis).
+    """
+    if len(df) <= max_pontos:
+        return df
+    blocos = np.arange(len(df)) * (max_pontos // 2) // len(df)
+    por_bloco = pd.Series(df[valores].to_numpy()).groupby(blocos)
+    manter = np.union1d(por_bloco.idxmin().to_numpy(), por_bloco.idxmax().to_numpy())
+    return df.iloc[manter]
+
+
+def reduzir_series(df, por, valores, max_pontos=MAX_PONTOS_SERIE):
+    """Aplica reduzir_serie a cada série (grupo de `por`) de um DataFrame longo já ordenado."""
+    if df.empty:
+        return df
+    series = [reduzir_serie(serie, valores, max_pontos) for _, serie in df.groupby(por, observed=True, sort=False)]
+    return pd.concat(series, ignore_index=True)
+
+
+def grafico_linhas(df, x, valores, cor, max_series=MAX_SERIES_GRAFICO, max_pontos=MAX_PONTOS_SERIE,
+                   max_bytes=MAX_BYTES_GRAFICO, **kwargs):
+    """
+    Gráfico de linhas de `valores` ao longo de `x`, uma linha por `cor`, dentro do orçamento:
+    mantém as `max_series` séries de maior total e soma as demais em "Outros" (por `x`), reduz
+    cada série a no máximo `max_pontos` pontos (ver reduzir_serie) e, se a figura serializada
+    ainda passar de `max_bytes`, reduz o número de séries pela metade até caber.
+    """
+    totais = agregar(df, cor, valores)
+    series = max_series
+    while True:
+        principais = top_n_com_outros(totais, cor, valores, series)[cor]
+        grupos = df[cor].astype("object").where(df[cor].isin(principais), ROTULO_OUTROS)
+        agregado = (
+            df.assign(**{cor: grupos})
+            .groupby([cor, x], as_index=False, sort=False)[valores].sum()
+            .sort_values(x, kind="stable", ignore_index=True)
+        )
+        fig = px.line(reduzir_series(agregado, cor, valores, max_pontos), x=x, y=valores, color=cor, **kwargs)
+        if series <= 2 or tamanho_figura(fig) <= max_bytes:
+            return fig
+        series = max(2, series // 2)
+
+
+def grafico_pizza(df, nomes, valores, max_pontos=MAX_PONTOS_GRAFICO, max_bytes=MAX_BYTES_GRAFICO, **kwargs):
+    """Gráfico de pizza com a soma de `valores` por `nomes`, agregado no servidor."""
+    agregado = agregar(df, nomes, valores)
+    return figura_com_orcamento(
+        agregado, nomes, valores,
+        lambda dados: px.pie(dados, names=nomes, values=valores, **kwargs),
+        max_pontos, max_bytes,
+    )
+
+
+def grafico_contagem(df, categoria, max_pontos=MAX_PONTOS_GRAFICO, max_bytes=MAX_BYTES_GRAFICO, **kwargs):
+    """Gráfico de barras com a quantidade de linhas por `categoria` (substitui px.histogram)."""
+    agregado = agregar(df, categoria)
+    return figura_com_orcamento(
+        agregado, categoria, "Quantidade",
+        lambda dados: px.bar(dados, x=categoria, y="Quantidade", **kwargs),
+        max_pontos, max_bytes,
+    )
+
+
+def grafico_barras(df, categoria, valores, max_pontos=MAX_PONTOS_GRAFICO, max_bytes=MAX_BYTES_GRAFICO, **kwargs):
+    """
+    Gráfico de barras com a soma de uma ou mais colunas de `valores` por `categoria`,
+    agregado no servidor e limitado ao orçamento de pontos/bytes.
+    """
+    agregado = agregar(df, categoria, valores)
+    return figura_com_orcamento(
+        agregado, categoria, valores,
+        lambda dados: px.bar(dados, x=categoria, y=valores, **kwargs),
+        max_pontos, max_bytes,
+    )
+
+
+def exibir_grafico(fig, max_bytes=MAX_BYTES_GRAFICO):
+    """
+    Envia a figura ao navegador se ela couber no orçamento de bytes; caso contrário, avisa
+    em vez de transmitir um payload grande demais.
+    """
+    tamanho = tamanho_figura(fig)
+    if tamanho > max_bytes:
+        st.warning(
+            f"Gráfico omitido: {tamanho / 1024:.0f} KB excede o limite de {max_bytes / 1024:.0f} KB. "
+            "Refine os filtros para reduzir os dados."
+        )
+        return
+    fig.update_layout(separators=SEPARADORES_PLOTLY)
+    st.plotly_chart(fig, use_container_width=True)
@@ -1,6 +1,9 @@
 import streamlit as st
 import plotly.express as px
-from utils import carregar_planilhas
+from compras import carregar_compras, filtrar_compras, pagina_compras
+from graficos import figura_com_orcamento, exibir_grafico
+from formatacao import formatar_moeda, tabela_formatada
+from dependencias import obter
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -8,6 +11,11 @@ import plotly.graph_objects as go
 from datetime import datetime
 import os
 import io
+from conta_corrente import carregar_conta_corrente
+from utils import MESES
+from validacao import exibir_validacao
+from empresas import selecionar_empresa
+from busca import exibir_busca
 
 st.set_page_config(
     page_title="Conta Corrente",
@@ -25,132 +33,6 @@ st.markdown(
 )
 
 
-BASE_DATA_DIR = "data"           # Pasta onde as planilhas estarão
-BASE_IMAGE_DIR = "images"         # Pasta onde as imagens estarão (caso queira utilizá-las)
-EXCEL_DADOS_FILE = os.path.join(BASE_DATA_DIR, "conta_corrente.xlsx")          # Arquivo Excel principal para o dashboard
-EXCEL_CONTA_FILE = os.path.join(BASE_DATA_DIR, "conta_corrente.xlsx")          # Arquivo Excel com a Conta Corrente
-
-def format_currency(value):
-    formatted = f"{value:,.2f}"
-    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {formatted}"
-
-def load_data_from_excel_layout_vertical():
-    if not os.path.exists(EXCEL_DADOS_FILE):
-        st.error(f"O arquivo {EXCEL_DADOS_FILE} não foi encontrado!")
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-    try:
-        df_excel = pd.read_excel(EXCEL_DADOS_FILE, header=None)
-        
-        raw_periods = df_excel.iloc[1, 1:].tolist()
-        
-        month_map = {
-            "JANEIRO": "01",
-            "FEVEREIRO": "02",
-            "MARÇO": "03",
-            "ABRIL": "04",
-            "MAIO": "05",
-            "JUNHO": "06",
-            "JULHO": "07",
-            "AGOSTO": "08",
-            "SETEMBRO": "09",
-            "OUTUBRO": "10",
-            "NOVEMBRO": "11",
-            "DEZEMBRO": "12"
-        }
-        
-        processed_periods = []
-        for p in raw_periods:
-            p_str = str(p).strip()
-            if p_str.lower() == "nan" or p_str == "":
-                processed_periods.append("")
-            else:
-                parts = p_str.split(".")
-                if len(parts) == 2:
-                    month_name = parts[0].strip().upper()
-                    year = parts[1].strip()
-                    month_num = month_map.get(month_name, "00")
-                    period_standard = f"{year}-{month_num}"
-                    processed_periods.append(period_standard)
-                else:
-                    processed_periods.append(p_str)
-        
-        period_index_pairs = [(i, p) for i, p in enumerate(processed_periods) if p != ""]
-        period_index_pairs.sort(key=lambda x: x[1])
-        sorted_indices = [i for i, p in period_index_pairs]
-        sorted_periods = [p for i, p in period_index_pairs]
-        
-        data_values = df_excel.iloc[2:, 1:]
-        data_values = data_values.iloc[:, sorted_indices]
-        
-        categories = df_excel.iloc[2:, 0].tolist()
-        
-        records = []
-        for i, cat in enumerate(categories):
-            category_str = str(cat).strip()
-            if category_str.upper() in {"RECEITAS", "DESPESAS"}:
-                continue
-            for j, period in enumerate(sorted_periods):
-                if period == "":
-                    continue
-                value = data_values.iloc[i, j]
-                if pd.notnull(value):
-                    valor = float(value)
-                    if valor < 0:
-                        tipo = "Despesa"
-                        valor = abs(valor)
-                    else:
-                        tipo = "Receita"
-                    records.append({
-                        "Data": period,
-                        "Categoria": category_str,
-                        "Valor": valor,
-                        "Tipo": tipo
-                    })
-        df_imported = pd.DataFrame(records)
-        return df_imported
-
-    except Exception as e:
-        st.error("Erro ao carregar o arquivo Excel: " + str(e))
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-
-def load_data_conta_corrente(sheet_name="MARÇO"):
-    if not os.path.exists(EXCEL_CONTA_FILE):
-        st.error(f"O arquivo {EXCEL_CONTA_FILE} não foi encontrado!")
-        return pd.DataFrame()
-    try:
-        df = pd.read_excel(EXCEL_CONTA_FILE, sheet_name=sheet_name, header=None)
-        df.columns = ["Descricao", "Valor"]
-
-        def convert_to_float(valor):
-            if pd.isna(valor):
-                return None
-            if isinstance(valor, (int, float)):
-                return float(valor)
-            valor = str(valor).strip()
-            # Somente converte se estiver no formato monetário
-            if not valor.startswith("R$"):
-                return None
-            valor = valor.replace("R$", "").strip()
-            valor = valor.replace(".", "").replace(",", ".")
-            try:
-                return float(valor)
-            except Exception:
-                return None
-
-        df["Valor"] = df["Valor"].apply(convert_to_float)
-        return df
-
-    except Exception as e:
-        st.error("Erro ao ler os dados da Conta Corrente: " + str(e))
-        return pd.DataFrame()
-
-# Carregar os dados de layout vertical (caso você precise em outra parte)
-data = load_data_from_excel_layout_vertical()
-
-if "Categorias" not in st.session_state:
-    st.session_state.Categorias = sorted(data["Categoria"].unique().tolist()) if not data.empty else []
-
 col1, col2 ,col3, col4 = st.columns(4)
 
 with col1:
@@ -162,70 +44,54 @@ with col3:
 with col4:
         st.page_link("pages/Relatorio_Vendas.py", label="Relatório de Vendas", icon="💳")
 
+# A empresa da sessão vem antes da busca, que consulta os dados dela
+selecionar_empresa()
+# Busca em categorias, lojas, fornecedores, pedidos e Conta Corrente (ver busca.py)
+exibir_busca()
+
 st.markdown(
     "<h1 style='text-align: center; color: #FFFFFF;'>📘 Conta Corrente</h1>",
     unsafe_allow_html=True
 )
 
-# Lista de meses em português (em caixa alta e com acentuação, conforme suas abas no Excel)
-meses = [
-    "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO", 
-    "JULHO", "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"
-]
+exibir_validacao("conta_corrente.xlsx", "compras.xlsx")
+
+# Série mensal da Conta Corrente (todas as abas lidas uma única vez)
+_, serie = carregar_conta_corrente()
 
 # Obtém o mês atual como string (ex.: "MARÇO")
-mes_atual = meses[datetime.now().month - 1]
-
-if os.path.exists(EXCEL_CONTA_FILE):
-    xls = pd.ExcelFile(EXCEL_CONTA_FILE)
-    abas_conta = xls.sheet_names
-    
-    # Tenta definir a aba padrão para o mês atual
-    if mes_atual in abas_conta:
-        default_index = abas_conta.index(mes_atual)
-    else:
-        default_index = 0  # Fallback: usa a primeira aba se o mês atual não estiver presente
-    
-    opcao = st.selectbox("Mês:", abas_conta, index=default_index)
-else:
-    opcao = "MARÇO"  # Valor padrão se o arquivo não existir (apenas para não travar)
+mes_atual = MESES[datetime.now().month - 1]
 
-# Utiliza o sheet selecionado para carregar os dados
-df = load_data_conta_corrente(sheet_name=opcao)
-if df.empty:
+if serie.empty:
     st.warning("Não há dados de Conta Corrente para exibir.")
 else:
-    df["Descricao"] = df["Descricao"].astype(str).str.upper().str.strip()
-
-    faturamento_lojas = df.loc[df["Descricao"] == "FATURAMENTO LOJAS", "Valor"].values[0]
-    faturamento_display = df.loc[df["Descricao"] == "FATURAMENTO DISPLAY/ATACADO", "Valor"].values[0]
-    descontos = df.loc[df["Descricao"] == "DESCONTO LOJAS", "Valor"].values[0]
-    perdas = df.loc[df["Descricao"] == "PERDAS LOJAS", "Valor"].values[0]
-    resultado_faturamento = df.loc[df["Descricao"] == "RESULTADO DO FATURAMENTO", "Valor"].values[0]
-    limite_compra_mes = df.loc[df["Descricao"] == "LIMITE COMPRA MÊS", "Valor"].values[0]
-    saldo_disponivel = df.loc[df["Descricao"] == "SALDO DISPONIVEL PARA COMPRAS", "Valor"].values[0]
+    # Mês escolhido pelo rótulo da aba, como na página Conta Corrente (as abas não têm ano)
+    abas_conta = serie.index.tolist()
+    abas_normalizadas = [aba.strip().upper() for aba in abas_conta]
+    # Tenta definir a aba padrão para o mês atual; fallback: primeira aba
+    default_index = abas_normalizadas.index(mes_atual) if mes_atual in abas_normalizadas else 0
+    opcao = st.selectbox("Mês:", abas_conta, index=default_index, key="compras_mes")
+    atual = serie.loc[opcao]
 
-    faturamento_bruto = faturamento_lojas + faturamento_display
-    resultado_faturamento_calculado = faturamento_bruto - descontos - perdas
-    limite_calculado = resultado_faturamento_calculado * 0.40
+    saldo_disponivel = atual.get("SALDO DISPONIVEL PARA COMPRAS", 0.0)
+    limite_calculado = atual["LIMITE CALCULADO"]
 
     st.subheader("🛒 Compras Realizadas")
-            
-    compras_para_aprovar = df.loc[df["Descricao"] == "COMPRAS PARA APROVAR (PENDENTE)", "Valor"].values[0]
-    compras_em_transito = df.loc[df["Descricao"] == "COMPRAS EM TRÂNSITO", "Valor"].values[0]
-    total_compras_nf = df.loc[df["Descricao"] == "TOTAL COMPRAS NOTA FISCAL", "Valor"].values[0]
-    total_compras_nota_especial = df.loc[df["Descricao"] == "TOTAL COMPRAS NOTA ESPECIAL", "Valor"].values[0]
-    total_compras_registradas = total_compras_nf + total_compras_nota_especial
+
+    compras_para_aprovar = atual.get("COMPRAS PARA APROVAR (PENDENTE)", 0.0)
+    compras_em_transito = atual.get("COMPRAS EM TRÂNSITO", 0.0)
+    total_compras_nf = atual.get("TOTAL COMPRAS NOTA FISCAL", 0.0)
+    total_compras_nota_especial = atual.get("TOTAL COMPRAS NOTA ESPECIAL", 0.0)
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("Limite de Compra", format_currency(limite_calculado))
-    col2.metric("Saldo Disponível", format_currency(saldo_disponivel))
-    col3.metric("Nota Especial", format_currency(total_compras_nota_especial))
+    col1.metric("Limite de Compra", formatar_moeda(limite_calculado))
+    col2.metric("Saldo Disponível", formatar_moeda(saldo_disponivel))
+    col3.metric("Nota Especial", formatar_moeda(total_compras_nota_especial))
 
     colc1, colc2, colc3 = st.columns(3)
-    colc1.metric("Compras P/ Aprovar", format_currency(compras_para_aprovar))
-    colc2.metric("Compras em Trânsito", format_currency(compras_em_transito))
-    colc3.metric("Compras NF", format_currency(total_compras_nf))
+    colc1.metric("Compras P/ Aprovar", formatar_moeda(compras_para_aprovar))
+    colc2.metric("Compras em Trânsito", formatar_moeda(compras_em_transito))
+    colc3.metric("Compras NF", formatar_moeda(total_compras_nf))
 
     st.markdown("---")
 
@@ -234,14 +100,78 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-_, _, compras = carregar_planilhas()
+compras, resumo_status = carregar_compras()
+
+if compras.empty:
+    st.warning("Não há compras registradas para exibir.")
+    st.stop()
+
+col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+with col_f1:
+    abas_compras = compras["Aba"].cat.categories.tolist()
+    opcao = st.selectbox("Escolha uma aba da planilha de Compras:", ["Todas"] + abas_compras, key="compras_aba")
+    abas_filtro = None if opcao == "Todas" else [opcao]
+with col_f2:
+    status_disponiveis = resumo_status.loc[
+        resumo_status["Aba"].isin(abas_filtro or abas_compras), "Status"
+    ].astype(str).unique().tolist()
+    status_filtro = st.multiselect("Status", status_disponiveis, key="compras_status")
+with col_f3:
+    busca = st.text_input("Buscar fornecedor", key="compras_busca")
+with col_f4:
+    # Limites do seletor: datas válidas da tabela (ordenada por Data, vazias no fim)
+    datas_validas = compras["Data"].dropna()
+    periodo = ()
+    if not datas_validas.empty:
+        primeira, ultima = datas_validas.iloc[0].date(), datas_validas.iloc[-1].date()
+        periodo = st.date_input(
+            "Período", value=(primeira, ultima), min_value=primeira, max_value=ultima,
+            format="DD/MM/YYYY", key="compras_periodo",
+        )
+# Período completo = sem filtro (mantém os pedidos sem data); enquanto só a data inicial foi
+# escolhida, o intervalo fica aberto no fim
+inicio_periodo = fim_periodo = None
+if periodo and tuple(periodo) != (primeira, ultima):
+    inicio_periodo = periodo[0]
+    fim_periodo = periodo[1] if len(periodo) > 1 else None
+
+posicoes = filtrar_compras(
+    compras, abas=abas_filtro, status=status_filtro, busca=busca.strip(),
+    inicio=inicio_periodo, fim=fim_periodo,
+)
 
-abas_compras = list(compras.keys())
-opcao = st.selectbox("Escolha uma aba da planilha de Compras:", abas_compras)
-df = compras[opcao]
+# Totais por status calculados no servidor: apenas o resumo vai para o gráfico
+resumo = (
+    compras.iloc[posicoes].groupby("Status", observed=True)
+    .agg(Quantidade=("Valor", "size"), Valor=("Valor", "sum"))
+    .reset_index()
+    if len(posicoes) < len(compras) else
+    resumo_status.groupby("Status", observed=True)[["Quantidade", "Valor"]].sum().reset_index()
+)
 
-st.dataframe(df,use_container_width=True)
+colm1, colm2 = st.columns(2)
+colm1.metric("Pedidos", f"{len(posicoes):,}".replace(",", "."))
+colm2.metric("Valor Total", formatar_moeda(resumo["Valor"].sum()))
+
+TAMANHO_PAGINA = 50
+total_paginas = max(1, -(-len(posicoes) // TAMANHO_PAGINA))
+pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+st.caption(f"Página {pagina} de {total_paginas} · {len(posicoes)} pedido(s) encontrados")
+
+# Linhas da página lidas da cópia com os textos de valores e datas já calculados (ver formatacao.py)
+st.dataframe(
+    tabela_formatada(
+        pagina_compras(obter("compras_exibicao"), posicoes, int(pagina), TAMANHO_PAGINA),
+        moeda=["Valor"], datas=["Data"],
+    ),
+    use_container_width=True,
+    hide_index=True,
+)
 
-if "Status" in df.columns:
-    fig = px.histogram(df, x="Status", color="Status", title="Situação das Compras")
-    st.plotly_chart(fig, use_container_width=True)
+if not resumo.empty:
+    fig = figura_com_orcamento(
+        resumo, "Status", ["Quantidade", "Valor"],
+        lambda dados: px.bar(dados, x="Status", y="Quantidade", color="Status", title="Situação das Compras",
+                             hover_data={"Valor": ":,.2f"}),
+    )
+    exibir_grafico(fig)
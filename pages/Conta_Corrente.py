@@ -1,10 +1,26 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import os
 import io
+from conta_corrente import (
+    FATORES_PERDAS_SIMULACAO,
+    FATORES_TRANSITO_SIMULACAO,
+    PERCENTUAIS_SIMULACAO,
+    PERCENTUAL_LIMITE_COMPRA,
+    carregar_conta_corrente,
+    simulacao_limites,
+)
+from utils import MESES
+from validacao import exibir_validacao
+from empresas import selecionar_empresa
+from busca import exibir_busca
+from dependencias import obter
+from formatacao import formatar_moeda, tabela_formatada
+from graficos import exibir_grafico, reduzir_series
 
 st.set_page_config(
     page_title="Conta Corrente",
@@ -22,132 +38,6 @@ st.markdown(
 )
 
 
-BASE_DATA_DIR = "data"           # Pasta onde as planilhas estarão
-BASE_IMAGE_DIR = "images"         # Pasta onde as imagens estarão (caso queira utilizá-las)
-EXCEL_DADOS_FILE = os.path.join(BASE_DATA_DIR, "conta_corrente.xlsx")          # Arquivo Excel principal para o dashboard
-EXCEL_CONTA_FILE = os.path.join(BASE_DATA_DIR, "conta_corrente.xlsx")          # Arquivo Excel com a Conta Corrente
-
-def format_currency(value):
-    formatted = f"{value:,.2f}"
-    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {formatted}"
-
-def load_data_from_excel_layout_vertical():
-    if not os.path.exists(EXCEL_DADOS_FILE):
-        st.error(f"O arquivo {EXCEL_DADOS_FILE} não foi encontrado!")
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-    try:
-        df_excel = pd.read_excel(EXCEL_DADOS_FILE, header=None)
-        
-        raw_periods = df_excel.iloc[1, 1:].tolist()
-        
-        month_map = {
-            "JANEIRO": "01",
-            "FEVEREIRO": "02",
-            "MARÇO": "03",
-            "ABRIL": "04",
-            "MAIO": "05",
-            "JUNHO": "06",
-            "JULHO": "07",
-            "AGOSTO": "08",
-            "SETEMBRO": "09",
-            "OUTUBRO": "10",
-            "NOVEMBRO": "11",
-            "DEZEMBRO": "12"
-        }
-        
-        processed_periods = []
-        for p in raw_periods:
-            p_str = str(p).strip()
-            if p_str.lower() == "nan" or p_str == "":
-                processed_periods.append("")
-            else:
-                parts = p_str.split(".")
-                if len(parts) == 2:
-                    month_name = parts[0].strip().upper()
-                    year = parts[1].strip()
-                    month_num = month_map.get(month_name, "00")
-                    period_standard = f"{year}-{month_num}"
-                    processed_periods.append(period_standard)
-                else:
-                    processed_periods.append(p_str)
-        
-        period_index_pairs = [(i, p) for i, p in enumerate(processed_periods) if p != ""]
-        period_index_pairs.sort(key=lambda x: x[1])
-        sorted_indices = [i for i, p in period_index_pairs]
-        sorted_periods = [p for i, p in period_index_pairs]
-        
-        data_values = df_excel.iloc[2:, 1:]
-        data_values = data_values.iloc[:, sorted_indices]
-        
-        categories = df_excel.iloc[2:, 0].tolist()
-        
-        records = []
-        for i, cat in enumerate(categories):
-            category_str = str(cat).strip()
-            if category_str.upper() in {"RECEITAS", "DESPESAS"}:
-                continue
-            for j, period in enumerate(sorted_periods):
-                if period == "":
-                    continue
-                value = data_values.iloc[i, j]
-                if pd.notnull(value):
-                    valor = float(value)
-                    if valor < 0:
-                        tipo = "Despesa"
-                        valor = abs(valor)
-                    else:
-                        tipo = "Receita"
-                    records.append({
-                        "Data": period,
-                        "Categoria": category_str,
-                        "Valor": valor,
-                        "Tipo": tipo
-                    })
-        df_imported = pd.DataFrame(records)
-        return df_imported
-
-    except Exception as e:
-        st.error("Erro ao carregar o arquivo Excel: " + str(e))
-        return pd.DataFrame(columns=["Data", "Categoria", "Valor", "Tipo"])
-
-def load_data_conta_corrente(sheet_name="MARÇO"):
-    if not os.path.exists(EXCEL_CONTA_FILE):
-        st.error(f"O arquivo {EXCEL_CONTA_FILE} não foi encontrado!")
-        return pd.DataFrame()
-    try:
-        df = pd.read_excel(EXCEL_CONTA_FILE, sheet_name=sheet_name, header=None)
-        df.columns = ["Descricao", "Valor"]
-
-        def convert_to_float(valor):
-            if pd.isna(valor):
-                return None
-            if isinstance(valor, (int, float)):
-                return float(valor)
-            valor = str(valor).strip()
-            # Somente converte se estiver no formato monetário
-            if not valor.startswith("R$"):
-                return None
-            valor = valor.replace("R$", "").strip()
-            valor = valor.replace(".", "").replace(",", ".")
-            try:
-                return float(valor)
-            except Exception:
-                return None
-
-        df["Valor"] = df["Valor"].apply(convert_to_float)
-        return df
-
-    except Exception as e:
-        st.error("Erro ao ler os dados da Conta Corrente: " + str(e))
-        return pd.DataFrame()
-
-# Carregar os dados de layout vertical (caso você precise em outra parte)
-data = load_data_from_excel_layout_vertical()
-
-if "Categorias" not in st.session_state:
-    st.session_state.Categorias = sorted(data["Categoria"].unique().tolist()) if not data.empty else []
-
 col1, col2 ,col3, col4 = st.columns(4)
 
 with col1:
@@ -159,71 +49,77 @@ with col3:
 with col4:
         st.page_link("pages/Relatorio_Vendas.py", label="Relatório de Vendas", icon="💳")
 
+# A empresa da sessão vem antes da busca, que consulta os dados dela
+selecionar_empresa()
+# Busca em categorias, lojas, fornecedores, pedidos e Conta Corrente (ver busca.py)
+exibir_busca()
+
 st.markdown(
     "<h1 style='text-align: center; color: #FFFFFF;'>📘 Conta Corrente</h1>",
     unsafe_allow_html=True
 )
 
-# Lista de meses em português (em caixa alta e com acentuação, conforme suas abas no Excel)
-meses = [
-    "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO", 
-    "JULHO", "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"
-]
+exibir_validacao("conta_corrente.xlsx")
+
+# Todas as abas da Conta Corrente, lidas uma única vez: lançamentos (longo) e série mensal (largo)
+lancamentos, serie = carregar_conta_corrente()
 
 # Obtém o mês atual como string (ex.: "MARÇO")
-mes_atual = meses[datetime.now().month - 1]
-
-if os.path.exists(EXCEL_CONTA_FILE):
-    xls = pd.ExcelFile(EXCEL_CONTA_FILE)
-    abas_conta = xls.sheet_names
-    
-    # Tenta definir a aba padrão para o mês atual
-    if mes_atual in abas_conta:
-        default_index = abas_conta.index(mes_atual)
-    else:
-        default_index = 0  # Fallback: usa a primeira aba se o mês atual não estiver presente
-    
-    opcao = st.selectbox("Mês:", abas_conta, index=default_index)
-else:
-    opcao = "MARÇO"  # Valor padrão se o arquivo não existir (apenas para não travar)
-
-# Utiliza o sheet selecionado para carregar os dados
-df = load_data_conta_corrente(sheet_name=opcao)
-if df.empty:
+mes_atual = MESES[datetime.now().month - 1]
+
+if serie.empty:
     st.warning("Não há dados de Conta Corrente para exibir.")
-else:
-    df["Descricao"] = df["Descricao"].astype(str).str.upper().str.strip()
-
-    faturamento_lojas = df.loc[df["Descricao"] == "FATURAMENTO LOJAS", "Valor"].values[0]
-    faturamento_display = df.loc[df["Descricao"] == "FATURAMENTO DISPLAY/ATACADO", "Valor"].values[0]
-    descontos = df.loc[df["Descricao"] == "DESCONTO LOJAS", "Valor"].values[0]
-    perdas = df.loc[df["Descricao"] == "PERDAS LOJAS", "Valor"].values[0]
-    resultado_faturamento = df.loc[df["Descricao"] == "RESULTADO DO FATURAMENTO", "Valor"].values[0]
-    limite_compra_mes = df.loc[df["Descricao"] == "LIMITE COMPRA MÊS", "Valor"].values[0]
-    saldo_disponivel = df.loc[df["Descricao"] == "SALDO DISPONIVEL PARA COMPRAS", "Valor"].values[0]
-
-    faturamento_bruto = faturamento_lojas + faturamento_display
-    resultado_faturamento_calculado = faturamento_bruto - descontos - perdas
-    limite_calculado = resultado_faturamento_calculado * 0.40
-
-    st.subheader("📊 Faturamento")
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Faturamento Lojas", format_currency(faturamento_lojas))
-    col2.metric("Faturamento Display", format_currency(faturamento_display))
-    col3.metric("Faturamento Bruto", format_currency(faturamento_bruto))
-
-    col4, col5, col6 = st.columns(3)
-    col4.metric("Descontos", format_currency(descontos))
-    col5.metric("Perdas", format_currency(perdas))
-    col6.metric("Faturamento Líquido", format_currency(resultado_faturamento_calculado))
-         
-    compras_para_aprovar = df.loc[df["Descricao"] == "COMPRAS PARA APROVAR (PENDENTE)", "Valor"].values[0]
-    compras_em_transito = df.loc[df["Descricao"] == "COMPRAS EM TRÂNSITO", "Valor"].values[0]
-    total_compras_nf = df.loc[df["Descricao"] == "TOTAL COMPRAS NOTA FISCAL", "Valor"].values[0]
-    total_compras_nota_especial = df.loc[df["Descricao"] == "TOTAL COMPRAS NOTA ESPECIAL", "Valor"].values[0]
-    total_compras_registradas = total_compras_nf + total_compras_nota_especial
-
-    st.markdown("---")
+    st.stop()
+
+# As abas da Conta Corrente são só meses, sem ano, então a série não tem o índice mensal de
+# periodos.py; ela já vem indexada e em ordem pelas abas, e o mês escolhido é lido direto
+# pelo rótulo/posição, sem filtrar a tabela
+abas_conta = serie.index.tolist()
+abas_normalizadas = [aba.strip().upper() for aba in abas_conta]
+# Tenta definir a aba padrão para o mês atual; fallback: primeira aba
+default_index = abas_normalizadas.index(mes_atual) if mes_atual in abas_normalizadas else 0
+opcao = st.selectbox("Mês:", abas_conta, index=default_index, key="cc_mes")
+
+posicao = abas_conta.index(opcao)
+atual = serie.iloc[posicao]
+# Mês anterior disponível, usado para as variações mês a mês
+anterior = serie.iloc[posicao - 1] if posicao > 0 else None
+
+
+def delta(indicador):
+    if anterior is None:
+        return None
+    return formatar_moeda(atual[indicador] - anterior[indicador])
+
+
+faturamento_lojas = atual.get("FATURAMENTO LOJAS", 0.0)
+faturamento_display = atual.get("FATURAMENTO DISPLAY/ATACADO", 0.0)
+descontos = atual.get("DESCONTO LOJAS", 0.0)
+perdas = atual.get("PERDAS LOJAS", 0.0)
+saldo_disponivel = atual.get("SALDO DISPONIVEL PARA COMPRAS", 0.0)
+
+faturamento_bruto = atual["FATURAMENTO BRUTO"]
+resultado_faturamento_calculado = atual["FATURAMENTO LÍQUIDO"]
+limite_calculado = atual["LIMITE CALCULADO"]
+
+st.subheader("📊 Faturamento")
+col1, col2, col3 = st.columns(3)
+col1.metric("Faturamento Lojas", formatar_moeda(faturamento_lojas), delta=delta("FATURAMENTO LOJAS"))
+col2.metric("Faturamento Display", formatar_moeda(faturamento_display), delta=delta("FATURAMENTO DISPLAY/ATACADO"))
+col3.metric("Faturamento Bruto", formatar_moeda(faturamento_bruto), delta=delta("FATURAMENTO BRUTO"))
+
+col4, col5, col6 = st.columns(3)
+col4.metric("Descontos", formatar_moeda(descontos), delta=delta("DESCONTO LOJAS"), delta_color="inverse")
+col5.metric("Perdas", formatar_moeda(perdas), delta=delta("PERDAS LOJAS"), delta_color="inverse")
+col6.metric("Faturamento Líquido", formatar_moeda(resultado_faturamento_calculado), delta=delta("FATURAMENTO LÍQUIDO"))
+
+compras_para_aprovar = atual.get("COMPRAS PARA APROVAR (PENDENTE)", 0.0)
+compras_em_transito = atual.get("COMPRAS EM TRÂNSITO", 0.0)
+total_compras_nf = atual.get("TOTAL COMPRAS NOTA FISCAL", 0.0)
+total_compras_nota_especial = atual.get("TOTAL COMPRAS NOTA ESPECIAL", 0.0)
+total_compras_registradas = atual["TOTAL COMPRAS REGISTRADAS"]
+
+st.markdown("---")
 
 col1, col2 = st.columns(2)
 with col1:
@@ -255,7 +151,7 @@ with col1:
         height=250,
         margin=dict(l=1, r=1, t=20, b=1)
     )
-    st.plotly_chart(fig, use_container_width=True)
+    exibir_grafico(fig)
 with col2:
     st.subheader("📊 Distribuição das Compras (%)")
 
@@ -283,11 +179,95 @@ with col2:
         margin=dict(l=20, r=20, t=20, b=20)
     )
 
-    st.plotly_chart(fig_pizza, use_container_width=True)
+    exibir_grafico(fig_pizza)
+
+st.markdown("---")
+st.subheader("📈 Evolução Mensal")
+indicadores_padrao = ["FATURAMENTO LÍQUIDO", "LIMITE CALCULADO", "TOTAL COMPRAS REGISTRADAS"]
+indicadores = st.multiselect(
+    "Indicadores",
+    serie.columns.tolist(),
+    default=[i for i in indicadores_padrao if i in serie.columns],
+    key="cc_indicadores",
+)
+if indicadores:
+    evolucao = serie[indicadores].rename_axis("Mês").reset_index().melt(
+        id_vars="Mês", var_name="Indicador", value_name="Valor"
+    )
+    # Indicadores escolhidos pelo usuário: nenhum é agrupado, só os pontos de cada série são limitados
+    fig_evolucao = px.line(reduzir_series(evolucao, "Indicador", "Valor"), x="Mês", y="Valor", color="Indicador",
+                           markers=True, labels={"Valor": "Valor (R$)"})
+    exibir_grafico(fig_evolucao)
+
+    variacao = serie[indicadores].diff()
+    st.markdown("#### Variação mês a mês")
+    st.dataframe(
+        tabela_formatada(variacao, moeda=indicadores),
+        use_container_width=True,
+    )
+
+st.markdown("---")
+st.subheader("🧮 Simulador de Limite de Compra")
+# A grade inteira (todos os meses x cenários) é calculada uma vez por versão da planilha;
+# os controles abaixo apenas escolhem a fatia exibida
+folga = simulacao_limites()
+col_sim1, col_sim2, col_sim3 = st.columns(3)
+with col_sim1:
+    percentual = st.select_slider(
+        "Limite (% do faturamento líquido)", PERCENTUAIS_SIMULACAO,
+        value=PERCENTUAL_LIMITE_COMPRA, format_func=lambda p: f"{p:.0%}", key="sim_percentual",
+    )
+with col_sim2:
+    fator_perdas = st.select_slider(
+        "Descontos + perdas (x registrado)", FATORES_PERDAS_SIMULACAO,
+        value=1.0, format_func=lambda f: f"{f:.2f}x", key="sim_perdas",
+    )
+with col_sim3:
+    fator_transito = st.select_slider(
+        "Compras em trânsito consideradas", FATORES_TRANSITO_SIMULACAO,
+        value=1.0, format_func=lambda f: f"{f:.0%}", key="sim_transito",
+    )
+
+i_percentual = PERCENTUAIS_SIMULACAO.index(percentual)
+i_perdas = FATORES_PERDAS_SIMULACAO.index(fator_perdas)
+i_transito = FATORES_TRANSITO_SIMULACAO.index(fator_transito)
+
+cenario = pd.DataFrame({"Mês": abas_conta, "Folga": folga[:, i_percentual, i_perdas, i_transito]})
+cenario["Situação"] = cenario["Folga"].ge(0).map({True: "Dentro do limite", False: "Acima do limite"})
+meses_acima = int((cenario["Folga"] < 0).sum())
+st.metric(
+    f"Folga em {opcao}", formatar_moeda(cenario["Folga"].iloc[posicao]),
+    help=f"{meses_acima} de {len(cenario)} meses acima do limite neste cenário",
+)
+
+col_sim4, col_sim5 = st.columns(2)
+with col_sim4:
+    fig_cenario = px.bar(
+        cenario, x="Mês", y="Folga", color="Situação",
+        color_discrete_map={"Dentro do limite": "#244610", "Acima do limite": "#c3670d"},
+        labels={"Folga": "Folga / excesso (R$)"}, title="Folga por mês no cenário",
+    )
+    exibir_grafico(fig_cenario)
+with col_sim5:
+    superficie = pd.DataFrame(
+        folga[posicao, :, :, i_transito],
+        index=[f"{p:.0%}" for p in PERCENTUAIS_SIMULACAO],
+        columns=[f"{f:.2f}x" for f in FATORES_PERDAS_SIMULACAO],
+    )
+    limite_cor = float(np.abs(superficie.to_numpy()).max()) or 1.0
+    fig_superficie = px.imshow(
+        superficie, color_continuous_scale="RdYlGn", zmin=-limite_cor, zmax=limite_cor, aspect="auto",
+        labels={"x": "Descontos + perdas", "y": "Limite", "color": "Folga (R$)"},
+        title=f"Folga em {opcao}: limite x descontos/perdas",
+    )
+    exibir_grafico(fig_superficie)
 
 st.markdown("---")
 st.subheader("📋 Registros Detalhados")
+# Textos em reais calculados uma vez por versão da planilha (ver formatacao.py)
+lancamentos_exibicao = obter("lancamentos_conta_corrente_exibicao")
+df = lancamentos_exibicao.loc[lancamentos_exibicao["Aba"] == opcao, ["Descricao", "Valor", "ValorTexto"]].reset_index(drop=True)
 st.dataframe(
-    df.style.format({"Valor": "R$ {:,.2f}"} , thousands=".", decimal=","),
+    tabela_formatada(df, moeda=["Valor"]),
     use_container_width=True
 )
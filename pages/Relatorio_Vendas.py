@@ -1,8 +1,16 @@
 import streamlit as st
 import plotly.express as px
-from utils import carregar_planilhas
+from dependencias import obter
+from utils import numero_mes
+from validacao import exibir_validacao
+from empresas import selecionar_empresa
+from busca import exibir_busca
+from graficos import grafico_barras, grafico_linhas, exibir_grafico
+from formatacao import formatar_moeda, tabela_formatada
+from periodos import acumulado_ano, mes, mes_em_todos_os_anos
+from previsao import carregar_previsoes
+from vendas import carregar_fatos_vendas, colunas_vendas_por_ano, acumulado_no_ano, tendencia_por_loja, ranking_lojas
 import pandas as pd
-import locale
 from datetime import datetime
 
 st.set_page_config(
@@ -33,11 +41,19 @@ with col3:
 with col4:
         st.page_link("pages/Relatorio_Vendas.py", label="Relatório de Vendas", icon="💳")
 
+# A empresa da sessão vem antes da busca, que consulta os dados dela
+selecionar_empresa()
+# Busca em categorias, lojas, fornecedores, pedidos e Conta Corrente (ver busca.py)
+exibir_busca()
+
 st.markdown(
     "<h1 style='text-align: center; color: #FFFFFF;'>📊 Relatório de Vendas</h1>",
     unsafe_allow_html=True
 )
-relatorio, _, _ = carregar_planilhas()
+exibir_validacao("relatorio_vendas.xlsx")
+relatorio = obter("planilhas_relatorio")
+fatos = carregar_fatos_vendas()
+previsoes = carregar_previsoes()
 
 # Obtém a lista de abas (supondo que elas sejam nomes de meses)
 abas_relatorio = list(relatorio.keys())
@@ -54,93 +70,164 @@ mes_atual = meses[datetime.now().month - 1]
 # Procura o índice da aba que corresponda ao mês atual (comparação case insensitive)
 default_index = 0  # fallback caso não encontre
 for idx, aba in enumerate(abas_relatorio):
-    if aba.lower() == mes_atual:
+    if aba.strip().lower() == mes_atual:
         default_index = idx
         break
 
 # Cria o selectbox utilizando o índice padrão
-opcao = st.selectbox("Mês", abas_relatorio, index=default_index)
+opcao = st.selectbox("Mês", abas_relatorio, index=default_index, key="vendas_mes")
 df = relatorio[opcao]
 
 # Verifica se é uma aba de mês (por ex. "Janeiro", "Fevereiro", "Março", etc.)
-eh_mes = any(mes in opcao.lower() for mes in meses)
+mes_selecionado = numero_mes(opcao)
+eh_mes = mes_selecionado is not None
 
-if eh_mes:
-    # Converte as colunas numéricas (caso estejam como texto)
-    df['META'] = pd.to_numeric(df['META'], errors='coerce')
-    df['VENDAS 2025'] = pd.to_numeric(df['VENDAS 2025'], errors='coerce')
+# Anos de vendas presentes na aba (ex.: {2025: "VENDAS 2025", 2024: "VENDAS 2024"})
+colunas_ano = colunas_vendas_por_ano(df)
+anos = list(colunas_ano)
+ano_atual = anos[0] if anos else None
+coluna_vendas_atual = colunas_ano.get(ano_atual)
 
+# Recorte da tabela de fatos para o mês selecionado
+fatos_mes = mes_em_todos_os_anos(fatos, mes_selecionado) if eh_mes else fatos.iloc[0:0]
+fatos_mes_atual = mes(fatos, (ano_atual, mes_selecionado)) if eh_mes and ano_atual else fatos.iloc[0:0]
+
+if eh_mes:
     # Cálculos agregados
-    total_meta = df['META'].sum()
-    total_vendas = df['VENDAS 2025'].sum()
+    total_meta = fatos_mes_atual['Meta'].sum()
+    total_vendas = fatos_mes_atual['Vendas'].sum()
     falta_meta = total_meta - total_vendas
-    dias_passados = 31  # Março tem 31 dias, pode ser automatizado se necessário
-    vendas_dia = total_vendas / dias_passados
-    previsao_fechamento = df['PREVISÃO DE FECHAMENTO'].sum()  # manter proporcional à média
+
+    # Projeção de fechamento pelo ritmo de vendas nos dias comerciais já apurados
+    previsoes_mes = mes(previsoes, (ano_atual, mes_selecionado))
+    dias_passados = int(previsoes_mes["DiasPassados"].max()) if not previsoes_mes.empty else 0
+    dias_mes = int(previsoes_mes["DiasMes"].max()) if not previsoes_mes.empty else 0
+    vendas_dia = total_vendas / dias_passados if dias_passados else 0.0
+    previsao_fechamento = previsoes_mes['ProjecaoSazonal'].sum()
 
     # Layout de métricas
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("🎯 META MENSAL", f"R$ {total_meta:,.2f}")
-    col2.metric("💰 TOTAL VENDAS", f"R$ {total_vendas:,.2f}")
-    col3.metric("📉 FALTA P/ META", f"R$ {falta_meta:,.2f}")
-    col4.metric("📈 PREVISÃO FECHAMENTO", f"R$ {previsao_fechamento:,.2f}")
+    col1.metric("🎯 META MENSAL", formatar_moeda(total_meta))
+    col2.metric("💰 TOTAL VENDAS", formatar_moeda(total_vendas))
+    col3.metric("📉 FALTA P/ META", formatar_moeda(falta_meta))
+    col4.metric("📈 PREVISÃO FECHAMENTO", formatar_moeda(previsao_fechamento))
+    st.caption(
+        f"{dias_passados} de {dias_mes} dias comerciais apurados · média de {formatar_moeda(vendas_dia)} por dia · "
+        f"projeção pelo ritmo: {formatar_moeda(previsoes_mes['ProjecaoRitmo'].sum())}"
+    )
 
 st.markdown("---")
 
 col1, col2 = st.columns([1.4, 1])
 with col1:
-    # Gráfico comparativo entre 2025 e 2024
-    comparativo = pd.DataFrame({
-        'Ano': ['2024', '2025'],
-        'Vendas': [df['VENDAS 2025'].sum(), df['VENDAS 2024'].sum()]
-    })
-    fig_comparativo = px.bar(comparativo, x='Ano', y='Vendas', text='Vendas',
-                              title="📊 Comparativo de Vendas: 2024 x 2025",
+    # Gráfico comparativo entre os anos disponíveis na aba
+    comparativo = (
+        fatos_mes.groupby("Ano", as_index=False)["Vendas"].sum()
+        .assign(Ano=lambda d: d["Ano"].astype(str))
+    )
+    titulo_anos = " x ".join(str(ano) for ano in sorted(anos))
+    comparativo["Rotulo"] = formatar_moeda(comparativo["Vendas"])
+    fig_comparativo = px.bar(comparativo, x='Ano', y='Vendas', text='Rotulo',
+                              title=f"📊 Comparativo de Vendas: {titulo_anos}",
                               labels={'Vendas': 'Total Vendido (R$)'})
-    fig_comparativo.update_traces(texttemplate='R$ %{text:,.2f}', textposition='outside')
-    st.plotly_chart(fig_comparativo, use_container_width=True)
+    fig_comparativo.update_traces(textposition='outside')
+    exibir_grafico(fig_comparativo)
 
 with col2:
-    colunas_para_mostrar = ['LOJA', 'VENDAS 2025', 'VENDAS 2024', 'META', 'PREVISÃO DE FECHAMENTO']
-    df_visivel = df[colunas_para_mostrar]
+    colunas_para_mostrar = ['LOJA'] + list(colunas_ano.values()) + ['META', 'PREVISÃO DE FECHAMENTO']
+    df_visivel = df[[c for c in colunas_para_mostrar if c in df.columns]]
     st.dataframe(df_visivel, use_container_width=True)
 
-# Gráfico de barras (Meta x Venda Atual), se colunas existirem
-if "META" in df.columns and "VENDAS 2025" in df.columns:
-    fig = px.bar(df, x=df.columns[0], y=["META", "VENDAS 2025"], barmode="group",
-                 title="📍 Meta vs Venda Atual por Loja")
-    st.plotly_chart(fig, use_container_width=True)
-
-# Relatório executivo: Lojas que bateram ou não bateram a meta
-if eh_mes:
-    df_relatorio = df.copy()
-
-    # Garantir que as colunas estão como número
-    df_relatorio['META'] = pd.to_numeric(df_relatorio['META'], errors='coerce')
-    df_relatorio['VENDAS 2025'] = pd.to_numeric(df_relatorio['VENDAS 2025'], errors='coerce')
+# Gráfico de barras (Meta x Venda Atual), agregado por loja e limitado às maiores lojas + "Outros"
+if not fatos_mes_atual.empty and coluna_vendas_atual is not None:
+    meta_vendas = fatos_mes_atual.rename(columns={"Meta": "META", "Vendas": coluna_vendas_atual})
+    fig = grafico_barras(meta_vendas, "LOJA", [coluna_vendas_atual, "META"], barmode="group",
+                         title="📍 Meta vs Venda Atual por Loja")
+    exibir_grafico(fig)
 
+# Visão consolidada de todos os meses: acumulado no ano, tendência por loja e crescimento anual
+if eh_mes and not fatos.empty:
     st.markdown(
-    "<h2 style='text-align: center; color: #FFFFFF;'>Performance por Loja</h2>",
-    unsafe_allow_html=True
-)
-
-col1, col2 = st.columns(2)
-with col1:    # Lojas que bateram a meta
-    lojas_ok = df_relatorio[df_relatorio['VENDAS 2025'] >= df_relatorio['META']]
-    if not lojas_ok.empty:
-        st.markdown("#### ✅ Lojas que bateram a meta:")
-        for _, row in lojas_ok.iterrows():
-            st.markdown(f"- 🟢 **{row['LOJA']}**: Vendeu R$ {row['VENDAS 2025']:,.2f} (Meta: R$ {row['META']:,.2f})")
-    else:
-        st.markdown("✅ Nenhuma loja bateu a meta.")
-
-with col2:
-    # Lojas que não bateram a meta
-    lojas_nok = df_relatorio[df_relatorio['VENDAS 2025'] < df_relatorio['META']]
-    if not lojas_nok.empty:
-        st.markdown("#### ❌ Lojas que **não** bateram a meta:")
-        for _, row in lojas_nok.iterrows():
-            falta = row['META'] - row['VENDAS 2025']
-            st.markdown(f"- 🔴 **{row['LOJA']}**: Vendeu R$ {row['VENDAS 2025']:,.2f} (Meta: R$ {row['META']:,.2f}) — **Faltou: R$ {falta:,.2f}**")
-    else:
-        st.markdown("🎉 Todas as lojas bateram a meta!")
+        "<h2 style='text-align: center; color: #FFFFFF;'>Acumulado no Ano</h2>",
+        unsafe_allow_html=True
+    )
+    ytd = acumulado_no_ano(fatos, ano_atual, mes_selecionado)
+    vendas_ytd = ytd["Vendas"].get(ano_atual, 0.0)
+    vendas_ytd_anterior = ytd["Vendas"].get(ano_atual - 1) if ano_atual is not None else None
+    meta_ytd = ytd["Meta"].get(ano_atual, 0.0)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("🎯 META ACUMULADA", formatar_moeda(meta_ytd))
+    col2.metric(
+        "💰 VENDAS ACUMULADAS", formatar_moeda(vendas_ytd),
+        delta=f"{vendas_ytd / vendas_ytd_anterior - 1:.1%}" if vendas_ytd_anterior else None,
+    )
+    # Mesmo modelo do card do mês: soma das projeções sazonais de janeiro até o mês selecionado
+    previsao_ytd = acumulado_ano(previsoes, (ano_atual, mes_selecionado))["ProjecaoSazonal"].sum()
+    col3.metric("📈 PREVISÃO ACUMULADA", formatar_moeda(previsao_ytd))
+
+    col1, col2 = st.columns([1.4, 1])
+    with col1:
+        # Maiores lojas + "Outros", com cada série limitada ao orçamento de pontos (ver graficos.py)
+        fig_tendencia = grafico_linhas(tendencia_por_loja(fatos), "Periodo", "Vendas", "LOJA", markers=True,
+                                       title="📈 Tendência de Vendas por Loja",
+                                       labels={"Vendas": "Total Vendido (R$)", "Periodo": "Mês"})
+        exibir_grafico(fig_tendencia)
+    with col2:
+        crescimento = mes(obter("crescimento_lojas"), (ano_atual, mes_selecionado))
+        st.markdown(f"#### Crescimento {ano_atual} x {ano_atual - 1}" if ano_atual else "#### Crescimento")
+        st.dataframe(
+            tabela_formatada(
+                crescimento[["LOJA", "Vendas", "VendasAnoAnterior", "Crescimento"]],
+                moeda=["Vendas", "VendasAnoAnterior"],
+            ).format("{:.1%}", subset=["Crescimento"], decimal=","),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+# Relatório executivo: ranking de performance das lojas no mês
+if eh_mes and not fatos_mes_atual.empty:
+    st.markdown(
+        "<h2 style='text-align: center; color: #FFFFFF;'>Performance por Loja</h2>",
+        unsafe_allow_html=True
+    )
+
+    total_lojas = fatos_mes_atual["LOJA"].nunique()
+    col_filtro1, col_filtro2 = st.columns(2)
+    with col_filtro1:
+        exibir = st.radio("Exibir", ["Todas", "Melhores", "Piores"], horizontal=True, key="ranking_exibir")
+    with col_filtro2:
+        limite = st.number_input(
+            "Quantidade de lojas", min_value=1, max_value=total_lojas,
+            value=min(10, total_lojas), step=1, key="ranking_limite",
+            disabled=exibir == "Todas",
+        )
+
+    ranking = ranking_lojas(
+        fatos_mes_atual,
+        limite=None if exibir == "Todas" else int(limite),
+        piores=exibir == "Piores",
+    )
+
+    bateram = int(ranking["BateuMeta"].eq(True).sum())
+    nao_bateram = int(ranking["BateuMeta"].eq(False).sum())
+    sem_meta = int(ranking["BateuMeta"].isna().sum())
+    resumo_meta = f"✅ **{bateram}** loja(s) bateram a meta · ❌ **{nao_bateram}** não bateram"
+    if sem_meta:
+        resumo_meta += f" · ➖ **{sem_meta}** sem meta"
+    st.markdown(resumo_meta)
+
+    def destacar_meta(linha):
+        if pd.isna(linha["BateuMeta"]):
+            return [""] * len(linha)
+        cor = "#244610" if linha["BateuMeta"] else "#7a2a0a"
+        return [f"background-color: {cor}"] * len(linha)
+
+    st.dataframe(
+        tabela_formatada(ranking, moeda=["Vendas", "Meta", "Gap"])
+        .apply(destacar_meta, axis=1)
+        .format("{:.1%}", subset=["Atingimento"], decimal=","),
+        use_container_width=True,
+        hide_index=True,
+        column_order=["Posicao", "LOJA", "Vendas", "Meta", "Atingimento", "Gap"],
+    )
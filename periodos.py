@@ -0,0 +1,86 @@
+import pandas as pd
+
+# Consultas de janelas de tempo sobre uma tabela indexada por mês.
+#
+# `indexar_por_mes` ordena a tabela uma única vez por um PeriodIndex mensal; as demais funções
+# resolvem cada janela com busca binária (searchsorted) sobre esse índice e devolvem uma fatia
+# posicional, sem montar máscaras booleanas sobre a tabela inteira.
+
+
+def para_periodo(valor):
+    """Converte "YYYY-MM", datas ou (ano, mes) em um pd.Period mensal."""
+    if isinstance(valor, tuple):
+        ano, mes = valor
+        return pd.Period(year=int(ano), month=int(mes), freq="M")
+    return pd.Period(valor, freq="M")
+
+
+def indexar_por_mes(df, coluna=None, ano="Ano", mes="Mes"):
+    """
+    Retorna uma cópia de `df` ordenada e indexada por um PeriodIndex mensal.
+
+    - coluna: coluna com o período em texto "YYYY-MM" ou datas; se None, usa as colunas
+      `ano` e `mes`.
+    Linhas cujo período não pode ser interpretado (ex.: "%") são descartadas.
+    """
+    if coluna is None:
+        datas = pd.to_datetime(
+            pd.DataFrame({"year": df[ano], "month": df[mes], "day": 1}), errors="coerce"
+        )
+    elif pd.api.types.is_datetime64_any_dtype(df[coluna]):
+        datas = df[coluna]
+    else:
+        datas = pd.to_datetime(df[coluna].astype(str), format="%Y-%m", errors="coerce")
+
+    validas = datas.notna().to_numpy()
+    indexado = df.loc[validas].copy()
+    indexado.index = pd.PeriodIndex(datas[validas], freq="M", name="Periodo")
+    return indexado.sort_index(kind="stable")
+
+
+def periodos_disponiveis(indexado):
+    """Lista ordenada dos meses distintos presentes na tabela indexada."""
+    return indexado.index.unique().tolist()
+
+
+def intervalo(indexado, inicio=None, fim=None):
+    """Linhas entre os meses `inicio` e `fim` (inclusive). Limites None deixam a janela aberta."""
+    indice = indexado.index
+    primeiro = indice.searchsorted(para_periodo(inicio), side="left") if inicio is not None else 0
+    ultimo = indice.searchsorted(para_periodo(fim), side="right") if fim is not None else len(indice)
+    return indexado.iloc[primeiro:ultimo]
+
+
+def mes(indexado, periodo):
+    """Linhas de um único mês."""
+    return intervalo(indexado, periodo, periodo)
+
+
+def janela_movel(indexado, pivo, antes=2, depois=2):
+    """
+    Janela de `antes` meses antes até `depois` meses depois do mês `pivo`
+    (atravessa a virada do ano normalmente).
+    """
+    pivo = para_periodo(pivo)
+    return intervalo(indexado, pivo - antes, pivo + depois)
+
+
+def mesmo_periodo_ano_anterior(indexado, inicio, fim=None):
+    """Mesma janela [inicio, fim] deslocada 12 meses para trás."""
+    inicio = para_periodo(inicio)
+    fim = para_periodo(fim) if fim is not None else inicio
+    return intervalo(indexado, inicio - 12, fim - 12)
+
+
+def mes_em_todos_os_anos(indexado, numero_mes):
+    """Linhas do mesmo mês do ano (1 a 12) em todos os anos da tabela: uma janela por ano."""
+    if indexado.empty:
+        return indexado
+    anos = range(indexado.index[0].year, indexado.index[-1].year + 1)
+    return pd.concat([mes(indexado, (ano, numero_mes)) for ano in anos])
+
+
+def acumulado_ano(indexado, ate):
+    """Janela de janeiro até o mês `ate` do mesmo ano (year-to-date)."""
+    ate = para_periodo(ate)
+    return intervalo(indexado, pd.Period(year=ate.year, month=1, freq="M"), ate)
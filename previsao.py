@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from dependencias import obter, registrar
+import vendas  # registra o nó fatos_vendas
+
+# Dias de funcionamento das lojas usados no cálculo do ritmo de vendas (segunda a sábado)
+DIAS_COMERCIAIS = "1111110"
+
+
+def dias_comerciais(inicio, fim, feriados=()):
+    """
+    Conta os dias comerciais no intervalo [inicio, fim) para arrays de datas, de uma só vez.
+    Aceita arrays NumPy datetime64 (ou qualquer valor conversível) e uma lista opcional de feriados.
+    """
+    return np.busday_count(
+        np.asarray(inicio, dtype="datetime64[D]"),
+        np.asarray(fim, dtype="datetime64[D]"),
+        weekmask=DIAS_COMERCIAIS,
+        holidays=np.asarray(feriados, dtype="datetime64[D]"),
+    )
+
+
+def projetar_fechamento(fatos, feriados=()):
+    """
+    Projeta o fechamento do mês para todas as lojas e meses da tabela de fatos em um único cálculo.
+
+    Para cada linha, usa a DataReferencia (último dia apurado) para contar os dias comerciais
+    passados e totais do mês e acrescenta as colunas:
+      - DiasPassados / DiasMes: dias comerciais apurados e totais do mês;
+      - ProjecaoRitmo: vendas / dias passados * dias do mês (run-rate);
+      - FatorSazonal: quanto o mesmo mês do ano anterior cresceu da mesma data até o fechamento;
+      - ProjecaoSazonal: vendas * fator sazonal, ou o ritmo quando não há histórico.
+    Meses já encerrados projetam exatamente o valor vendido e, quando a planilha informa o
+    fechamento do mês (anos anteriores), ele é usado no lugar da projeção.
+    """
+    projecao = fatos.copy()
+    if projecao.empty:
+        for coluna in ["DiasPassados", "DiasMes", "ProjecaoRitmo", "FatorSazonal", "ProjecaoSazonal"]:
+            projecao[coluna] = pd.Series(dtype="float64")
+        return projecao
+
+    meses = (projecao["Ano"].to_numpy("int64") - 1970) * 12 + projecao["Mes"].to_numpy("int64") - 1
+    inicio = meses.astype("datetime64[M]").astype("datetime64[D]")
+    fim = (meses + 1).astype("datetime64[M]").astype("datetime64[D]")
+
+    # Sem data de referência, considera o mês inteiro apurado
+    referencia = projecao["DataReferencia"].to_numpy("datetime64[D]")
+    referencia = np.where(np.isnat(referencia), fim - 1, referencia)
+    encerrado = referencia >= fim - 1
+
+    passados = dias_comerciais(inicio, np.minimum(referencia + 1, fim), feriados)
+    totais = dias_comerciais(inicio, fim, feriados)
+    vendas = projecao["Vendas"].to_numpy("float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ritmo = np.where(passados > 0, vendas / passados * totais, np.nan)
+        # Razão fechamento / parcial de cada linha, usada como fator do ano seguinte
+        razao = projecao["Fechamento"].to_numpy("float64") / vendas
+    razao[~np.isfinite(razao)] = np.nan
+
+    anterior = pd.DataFrame({
+        "LOJA": projecao["LOJA"],
+        "Ano": projecao["Ano"] + 1,
+        "Mes": projecao["Mes"],
+        "FatorSazonal": razao,
+    }).drop_duplicates(["LOJA", "Ano", "Mes"])
+    fator = (
+        projecao[["LOJA", "Ano", "Mes"]]
+        .merge(anterior, on=["LOJA", "Ano", "Mes"], how="left")["FatorSazonal"]
+        .to_numpy("float64")
+    )
+
+    realizado = projecao["Fechamento"].to_numpy("float64")
+    realizado = np.where(np.isnan(realizado) & encerrado, vendas, realizado)
+    conhecido = ~np.isnan(realizado)
+
+    projecao["DiasPassados"] = passados
+    projecao["DiasMes"] = totais
+    projecao["ProjecaoRitmo"] = np.where(conhecido, realizado, ritmo)
+    projecao["FatorSazonal"] = fator
+    projecao["ProjecaoSazonal"] = np.where(
+        conhecido, realizado, np.where(np.isnan(fator), ritmo, vendas * fator)
+    )
+    return projecao
+
+
+registrar("previsoes", ["fatos_vendas"], projetar_fechamento)
+
+
+def carregar_previsoes():
+    """Projeções de fechamento de todas as lojas e meses, recalculadas só quando o relatório muda."""
+    return obter("previsoes")
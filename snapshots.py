@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# Histórico das planilhas: cada versão lida de um .xlsx vira um snapshot imutável.
+#
+#   <pasta da empresa>/.snapshots/abas/<hash>.pkl.gz        uma aba já lida, pelo conteúdo
+#   <pasta da empresa>/.snapshots/<arquivo>/<momento>.json  manifesto: aba -> hash
+#
+# Abas iguais entre versões têm o mesmo hash e são gravadas uma única vez, então guardar
+# centenas de versões custa pouco além das abas que de fato mudaram. O momento de um snapshot
+# é a data de modificação do arquivo lido.
+
+PASTA_SNAPSHOTS = ".snapshots"
+FORMATO_MOMENTO = "%Y%m%dT%H%M%S"
+
+
+def _pasta(diretorio, *partes):
+    return os.path.join(diretorio, PASTA_SNAPSHOTS, *partes)
+
+
+def _gravar_atomico(caminho, escrever):
+    """Grava em um arquivo temporário e renomeia, para nunca deixar um arquivo pela metade."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+
+def hash_aba(df):
+    """Identificador do conteúdo de uma aba: muda se qualquer célula, coluna ou tipo mudar."""
+    resumo = hashlib.sha256()
+    resumo.update(repr((list(df.columns), [str(tipo) for tipo in df.dtypes])).encode("utf-8"))
+    resumo.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return resumo.hexdigest()
+
+
+def eh_manifesto(caminho):
+    """Indica se o caminho é o manifesto de um snapshot (e não a planilha ao vivo)."""
+    return os.path.basename(os.path.dirname(os.path.dirname(caminho))) == PASTA_SNAPSHOTS
+
+
+def momento_do_arquivo(caminho):
+    return datetime.fromtimestamp(os.stat(caminho).st_mtime).strftime(FORMATO_MOMENTO)
+
+
+def gravar_snapshot(caminho, planilhas):
+    """
+    Guarda as abas lidas de `caminho` como um snapshot, se o conteúdo for diferente do último
+    snapshot do mesmo arquivo. Só as abas ainda não guardadas são gravadas.
+    """
+    diretorio, arquivo = os.path.split(caminho)
+    abas = {nome: hash_aba(df) for nome, df in planilhas.items()}
+
+    anteriores = listar_snapshots(diretorio, arquivo)
+    if anteriores:
+        with open(_pasta(diretorio, arquivo, anteriores[-1] + ".json"), encoding="utf-8") as f:
+            if json.load(f)["abas"] == abas:
+                return None
+
+    for nome, codigo in abas.items():
+        destino = _pasta(diretorio, "abas", codigo + ".pkl.gz")
+        if not os.path.exists(destino):
+            _gravar_atomico(destino, lambda temporario, df=planilhas[nome]: df.to_pickle(temporario, compression="gzip"))
+
+    momento = momento_do_arquivo(caminho)
+    manifesto = {"arquivo": arquivo, "momento": momento, "abas": abas}
+    destino = _pasta(diretorio, arquivo, momento + ".json")
+
+    def escrever(temporario):
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1)
+
+    _gravar_atomico(destino, escrever)
+    return momento
+
+
+def listar_snapshots(diretorio, arquivo):
+    """Momentos dos snapshots de um arquivo, do mais antigo para o mais recente."""
+    pasta = _pasta(diretorio, arquivo)
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(nome[:-5] for nome in os.listdir(pasta) if nome.endswith(".json"))
+
+
+def listar_momentos(diretorio):
+    """Todos os momentos com snapshot de alguma planilha da pasta, do mais recente para o mais antigo."""
+    pasta = _pasta(diretorio)
+    if not os.path.isdir(pasta):
+        return []
+    momentos = set()
+    for arquivo in os.listdir(pasta):
+        if arquivo != "abas":
+            momentos.update(listar_snapshots(diretorio, arquivo))
+    return sorted(momentos, reverse=True)
+
+
+def caminho_manifesto(diretorio, arquivo, momento):
+    """
+    Manifesto de `arquivo` como estava em `momento`: o último snapshot até esse momento.
+    Se o arquivo ainda não existia, retorna um caminho inexistente (planilha ausente).
+    """
+    anteriores = [m for m in listar_snapshots(diretorio, arquivo) if m <= momento]
+    escolhido = anteriores[-1] if anteriores else f"{momento}-ausente"
+    return _pasta(diretorio, arquivo, escolhido + ".json")
+
+
+def ler_snapshot(caminho_manifesto_):
+    """Abas de um snapshot, no mesmo formato de pd.read_excel(..., sheet_name=None)."""
+    with open(caminho_manifesto_, encoding="utf-8") as f:
+        manifesto = json.load(f)
+    diretorio = os.path.dirname(os.path.dirname(os.path.dirname(caminho_manifesto_)))
+    return {
+        nome: pd.read_pickle(_pasta(diretorio, "abas", codigo + ".pkl.gz"), compression="gzip")
+        for nome, codigo in manifesto["abas"].items()
+    }
+
+
+def formatar_momento(momento):
+    """Momento de um snapshot para exibição (ex.: 07/05/2025 14:32)."""
+    return datetime.strptime(momento, FORMATO_MOMENTO).strftime("%d/%m/%Y %H:%M")
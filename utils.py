@@ -1,9 +1,53 @@
+import os
+
 import pandas as pd
-import streamlit as st
-
-@st.cache_data
-def carregar_planilhas():
-    relatorio = pd.read_excel("data/relatorio_vendas.xlsx", None)
-    conta_corrente = pd.read_excel("data/conta_corrente.xlsx", None)
-    compras = pd.read_excel("data/compras.xlsx", None)
-    return relatorio, conta_corrente, compras
+
+from dependencias import registrar, registrar_fonte
+from snapshots import eh_manifesto, gravar_snapshot, ler_snapshot
+
+# Nomes dos meses em português, em caixa alta, como aparecem nas abas das planilhas
+MESES = [
+    "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO",
+    "JULHO", "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"
+]
+
+
+def numero_mes(nome):
+    """
+    Converte o nome de um mês em português (ex.: " Março") para o número do mês (1 a 12).
+    Retorna None se o nome não corresponder a nenhum mês.
+    """
+    nome = str(nome).strip().upper()
+    if nome in MESES:
+        return MESES.index(nome) + 1
+    return None
+
+
+def _ler_planilhas(caminho, **kwargs):
+    """
+    Lê todas as abas de uma planilha; retorna um dicionário vazio se o arquivo não existir.
+    `caminho` pode ser o manifesto de um snapshot, que é lido sem abrir o Excel. Cada versão
+    nova lida do Excel é guardada como snapshot (ver snapshots.py).
+    """
+    if not os.path.exists(caminho):
+        return {}
+    if eh_manifesto(caminho):
+        return ler_snapshot(caminho)
+    planilhas = pd.read_excel(caminho, None, **kwargs)
+    try:
+        gravar_snapshot(caminho, planilhas)
+    except OSError:
+        # Sem permissão de escrita na pasta: o histórico fica sem esta versão
+        pass
+    return planilhas
+
+
+# Fontes (arquivos na pasta de cada empresa) e planilhas lidas do disco (ver dependencias.py)
+registrar_fonte("dados.xlsx")
+registrar_fonte("relatorio_vendas.xlsx")
+registrar_fonte("conta_corrente.xlsx")
+registrar_fonte("compras.xlsx")
+registrar("planilhas_dados", ["dados.xlsx"], lambda caminho: _ler_planilhas(caminho, header=None))
+registrar("planilhas_relatorio", ["relatorio_vendas.xlsx"], _ler_planilhas)
+registrar("planilhas_conta_corrente", ["conta_corrente.xlsx"], lambda caminho: _ler_planilhas(caminho, header=None))
+registrar("planilhas_compras", ["compras.xlsx"], _ler_planilhas)
@@ -0,0 +1,207 @@
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dependencias import obter, registrar
+from utils import MESES, numero_mes
+
+# Esquema esperado de cada planilha, verificado logo após a leitura.
+#
+# Regras disponíveis:
+#   abas_meses            - só valida abas com nome de mês; as demais são apontadas como ignoradas
+#   colunas_obrigatorias  - cabeçalhos que precisam existir (comparados sem espaços nas pontas)
+#   colunas_padrao        - {regex: descrição}: ao menos uma coluna precisa casar com o padrão
+#   colunas_recomendadas  - cabeçalhos cuja falta só gera aviso
+#   colunas_numericas     - cabeçalhos (ou regex) cujos valores precisam ser numéricos
+#   linhas_com            - considera só as linhas em que esta coluna está preenchida
+#   colunas_minimas       - número mínimo de colunas (planilhas sem cabeçalho)
+#   rotulos_obrigatorios  - textos que precisam aparecer na coluna de rótulos (planilhas sem cabeçalho)
+#   celulas               - {(linha, coluna): texto}: células fixas do layout (base 0)
+#   linha_periodos        - linha (base 0) com os períodos "MÊS.ANO" a partir da coluna B
+ESQUEMAS = {
+    "relatorio_vendas.xlsx": {
+        "planilhas": "planilhas_relatorio",
+        "abas_meses": True,
+        "colunas_obrigatorias": ["LOJA", "META"],
+        "colunas_padrao": {r"^VENDAS\s+\d{4}$": "VENDAS <ANO>"},
+        "colunas_recomendadas": ["PREVISÃO DE FECHAMENTO"],
+        "colunas_numericas": ["META", r"^VENDAS\s+\d{4}$", "PREVISÃO DE FECHAMENTO"],
+        "linhas_com": "LOJA",
+    },
+    "conta_corrente.xlsx": {
+        "planilhas": "planilhas_conta_corrente",
+        "abas_meses": True,
+        "colunas_minimas": 2,
+        "rotulos_obrigatorios": [
+            "FATURAMENTO LOJAS", "FATURAMENTO DISPLAY/ATACADO", "DESCONTO LOJAS", "PERDAS LOJAS",
+            "SALDO DISPONIVEL PARA COMPRAS", "COMPRAS PARA APROVAR (PENDENTE)", "COMPRAS EM TRÂNSITO",
+            "TOTAL COMPRAS NOTA FISCAL", "TOTAL COMPRAS NOTA ESPECIAL",
+        ],
+    },
+    "compras.xlsx": {
+        "planilhas": "planilhas_compras",
+        "colunas_obrigatorias": ["FORNECEDOR"],
+    },
+    "dados.xlsx": {
+        "planilhas": "planilhas_dados",
+        "celulas": {(1, 0): "PERÍODO"},
+        "linha_periodos": 1,
+    },
+}
+
+COLUNAS_VALIDACAO = ["Arquivo", "Aba", "Severidade", "Regra", "Local", "Detalhe"]
+
+# Período no cabeçalho de dados.xlsx (ex.: "MARÇO.2025", "FEVEREIRO .2024"); "%" marca colunas de variação
+PADRAO_PERIODO = re.compile(r"^\s*([A-ZÇ]+)\s*\.\s*(\d{4})\s*$")
+
+
+def _letra_coluna(posicao):
+    """Converte a posição (base 0) de uma coluna na letra usada pelo Excel (0 -> A, 27 -> AB)."""
+    letras = ""
+    posicao += 1
+    while posicao:
+        posicao, resto = divmod(posicao - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _violacoes_numericas(df, colunas, rotulos, primeira_linha):
+    """
+    Células não vazias que não podem ser convertidas para número, agrupadas por coluna.
+    `rotulos` são os nomes exibidos das colunas e `primeira_linha` é a linha do Excel que
+    corresponde à primeira linha de `df`. Retorna uma lista de (local, detalhe).
+    """
+    if not colunas:
+        return []
+    brutos = df[colunas]
+    numericos = brutos.apply(pd.to_numeric, errors="coerce")
+    invalidos = (numericos.isna() & brutos.notna()).to_numpy()
+    violacoes = []
+    for j in np.flatnonzero(invalidos.any(axis=0)):
+        linhas = np.flatnonzero(invalidos[:, j]) + primeira_linha
+        violacoes.append((
+            f"Coluna {rotulos[j]}, linha(s) {', '.join(map(str, linhas))}",
+            f"{len(linhas)} valor(es) não numérico(s)",
+        ))
+    return violacoes
+
+
+def validar_planilhas(arquivo, planilhas, esquema=None):
+    """
+    Verifica todas as abas de uma planilha contra o esquema declarado em ESQUEMAS.
+    Retorna um DataFrame com todas as violações encontradas (uma por linha), com as colunas:
+    Arquivo, Aba, Severidade ("erro" impede o uso dos dados; "aviso" não), Regra, Local, Detalhe.
+    """
+    esquema = esquema or ESQUEMAS[arquivo]
+    violacoes = []
+
+    def registrar_violacao(aba, severidade, regra, local, detalhe):
+        violacoes.append((arquivo, aba, severidade, regra, local, detalhe))
+
+    if not planilhas:
+        registrar_violacao("", "erro", "arquivo", "", "Arquivo não encontrado ou sem abas.")
+
+    for aba, df in planilhas.items():
+        if esquema.get("abas_meses") and numero_mes(aba) is None:
+            registrar_violacao(aba, "aviso", "aba", "", "Nome da aba não é um mês; a aba será ignorada.")
+            continue
+
+        cabecalhos = {str(c).strip().upper(): c for c in df.columns}
+
+        for coluna in esquema.get("colunas_obrigatorias", []):
+            if coluna not in cabecalhos:
+                registrar_violacao(aba, "erro", "coluna obrigatória", coluna, "Coluna ausente.")
+        for padrao, descricao in esquema.get("colunas_padrao", {}).items():
+            if not any(re.match(padrao, nome) for nome in cabecalhos):
+                registrar_violacao(aba, "erro", "coluna obrigatória", descricao, "Nenhuma coluna com este formato.")
+        for coluna in esquema.get("colunas_recomendadas", []):
+            if coluna not in cabecalhos:
+                registrar_violacao(aba, "aviso", "coluna recomendada", coluna, "Coluna ausente.")
+
+        if esquema.get("colunas_numericas"):
+            colunas = [
+                original for nome, original in cabecalhos.items()
+                if any(re.fullmatch(regra, nome) for regra in esquema["colunas_numericas"])
+            ]
+            valores = df[colunas].reset_index(drop=True)
+            if esquema.get("linhas_com") in cabecalhos:
+                # Mantém as posições originais para apontar a linha certa no Excel
+                valores = valores.where(df[cabecalhos[esquema["linhas_com"]]].notna().reset_index(drop=True), axis=0)
+            rotulos = [f"'{coluna}'" for coluna in colunas]
+            for local, detalhe in _violacoes_numericas(valores, colunas, rotulos, primeira_linha=2):
+                registrar_violacao(aba, "aviso", "valor numérico", local, detalhe)
+
+        minimo = esquema.get("colunas_minimas")
+        if minimo and df.shape[1] < minimo:
+            registrar_violacao(aba, "erro", "layout", "", f"Esperadas ao menos {minimo} colunas, encontradas {df.shape[1]}.")
+            continue
+
+        if esquema.get("rotulos_obrigatorios"):
+            rotulos = df.iloc[:, 0].astype(str).str.upper().str.strip()
+            valores = df.iloc[:, 1]
+            obrigatorios = pd.Index(esquema["rotulos_obrigatorios"])
+            for rotulo in obrigatorios[~obrigatorios.isin(rotulos)]:
+                registrar_violacao(aba, "aviso", "rótulo obrigatório", rotulo, "Rótulo ausente; o valor será considerado 0.")
+            numericos = pd.to_numeric(valores, errors="coerce")
+            monetarios = valores.astype("string").str.strip().str.startswith("R$", na=False)
+            invalidos = rotulos.isin(obrigatorios) & valores.notna() & numericos.isna() & ~monetarios
+            for posicao in np.flatnonzero(invalidos.to_numpy()):
+                registrar_violacao(aba, "aviso", "valor numérico", f"B{posicao + 1}",
+                                   f"Valor de '{rotulos.iloc[posicao]}' não é numérico nem monetário.")
+
+        for (linha, coluna), esperado in esquema.get("celulas", {}).items():
+            local = f"{_letra_coluna(coluna)}{linha + 1}"
+            encontrado = df.iat[linha, coluna] if linha < df.shape[0] and coluna < df.shape[1] else None
+            if str(encontrado).strip().upper() != esperado:
+                registrar_violacao(aba, "erro", "layout", local, f"Esperado '{esperado}', encontrado '{encontrado}'.")
+
+        linha_periodos = esquema.get("linha_periodos")
+        if linha_periodos is not None and linha_periodos < df.shape[0]:
+            periodos = df.iloc[linha_periodos, 1:].astype("string").str.strip().str.upper()
+            preenchidos = periodos.notna() & periodos.ne("") & periodos.ne("%")
+            partes = periodos.str.extract(PADRAO_PERIODO)
+            mes_valido = partes[0].isin(MESES)
+            invalidos = preenchidos & ~mes_valido
+            for posicao in np.flatnonzero(invalidos.to_numpy()):
+                registrar_violacao(aba, "aviso", "período", f"{_letra_coluna(posicao + 1)}{linha_periodos + 1}",
+                                   f"'{periodos.iloc[posicao]}' não está no formato MÊS.ANO; a coluna será ignorada.")
+            # Valores das colunas de período (da linha seguinte em diante) precisam ser numéricos
+            posicoes = np.flatnonzero(mes_valido.to_numpy()) + 1
+            colunas = [df.columns[p] for p in posicoes]
+            rotulos = [_letra_coluna(p) for p in posicoes]
+            valores = df.iloc[linha_periodos + 1:].reset_index(drop=True)
+            for local, detalhe in _violacoes_numericas(valores, colunas, rotulos, primeira_linha=linha_periodos + 2):
+                registrar_violacao(aba, "aviso", "valor numérico", local, detalhe)
+
+    return pd.DataFrame(violacoes, columns=COLUNAS_VALIDACAO)
+
+
+for _arquivo, _esquema in ESQUEMAS.items():
+    registrar(
+        f"validacao_{_arquivo}", [_esquema["planilhas"]],
+        lambda planilhas, arquivo=_arquivo: validar_planilhas(arquivo, planilhas),
+    )
+
+
+def validar(arquivo):
+    """Resultado da validação de uma planilha, em cache por versão do arquivo."""
+    return obter(f"validacao_{arquivo}")
+
+
+def exibir_validacao(*arquivos):
+    """
+    Mostra as violações das planilhas informadas no topo da página. Se houver algum erro,
+    lista todas as violações e interrompe a página antes de qualquer cálculo.
+    """
+    resultado = pd.concat([validar(arquivo) for arquivo in arquivos], ignore_index=True)
+    if resultado.empty:
+        return
+    erros = resultado["Severidade"].eq("erro")
+    if erros.any():
+        st.error(f"⚠️ {int(erros.sum())} erro(s) de estrutura nas planilhas. Corrija-os para carregar esta página.")
+        st.dataframe(resultado, use_container_width=True, hide_index=True)
+        st.stop()
+    with st.expander(f"⚠️ {len(resultado)} aviso(s) na validação das planilhas"):
+        st.dataframe(resultado, use_container_width=True, hide_index=True)
@@ -0,0 +1,212 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from dependencias import obter, registrar
+from periodos import acumulado_ano, indexar_por_mes, mesmo_periodo_ano_anterior
+from utils import numero_mes
+
+# Colunas de vendas anuais nas abas do relatório (ex.: "VENDAS 2025", "VENDAS 2024")
+PADRAO_COLUNA_VENDAS = re.compile(r"^VENDAS\s+(\d{4})$")
+# Colunas com a venda do último dia apurado (ex.: "VENDAS DO DIA 07/05/2025")
+PADRAO_COLUNA_DIA = re.compile(r"^VENDAS?\s+DO\s+DIA\s+(\d{2}/\d{2}/(\d{4}))$")
+# Colunas com o fechamento do mês em anos anteriores (ex.: "JAN.2024")
+PADRAO_COLUNA_FECHAMENTO = re.compile(r"^[A-ZÇ]{3}\.(\d{4})$")
+
+COLUNAS_FATOS = ["LOJA", "Ano", "Mes", "Meta", "Vendas", "Previsao", "DataReferencia", "Fechamento"]
+
+
+def colunas_vendas_por_ano(df):
+    """
+    Detecta as colunas de vendas anuais de uma aba do relatório de vendas.
+    Retorna um dicionário {ano: coluna}, do ano mais recente para o mais antigo.
+    """
+    colunas = _colunas_por_ano(df, PADRAO_COLUNA_VENDAS, 1)
+    return dict(sorted(colunas.items(), reverse=True))
+
+
+def _colunas_por_ano(df, padrao, grupo_ano):
+    """Mapeia {ano: coluna} para as colunas que casam com `padrao`."""
+    colunas = {}
+    for coluna in df.columns:
+        encontrado = padrao.match(str(coluna).strip())
+        if encontrado:
+            colunas[int(encontrado.group(grupo_ano))] = coluna
+    return colunas
+
+
+def montar_fatos_vendas(relatorio):
+    """
+    Consolida todas as abas de meses do relatório de vendas em uma única tabela longa.
+
+    Cada linha representa uma loja em um mês de um ano, com as colunas:
+    LOJA, Ano, Mes, Meta, Vendas, Previsao, DataReferencia, Fechamento.
+
+    Os anos são detectados pelas colunas "VENDAS <ANO>" de cada aba. A meta e a previsão de
+    fechamento existem apenas para o ano mais recente da aba; para os anos anteriores ficam vazias.
+    DataReferencia é o último dia apurado em "VENDAS DO DIA dd/mm/aaaa" e Fechamento é o total
+    do mês fechado quando a aba o informa (ex.: coluna "JAN.2024").
+    Abas que não são meses ou que não possuem a coluna LOJA são ignoradas.
+
+    A tabela é indexada por mês (ver periodos.indexar_por_mes) para consultas por janela de tempo.
+    """
+    partes = []
+    for aba, df in relatorio.items():
+        mes = numero_mes(aba)
+        if mes is None or "LOJA" not in df.columns:
+            continue
+        colunas_ano = colunas_vendas_por_ano(df)
+        if not colunas_ano:
+            continue
+
+        df = df[df["LOJA"].notna()]
+        lojas = df["LOJA"].astype(str).str.strip()
+        ano_atual = max(colunas_ano)
+        meta = pd.to_numeric(df.get("META"), errors="coerce")
+        previsao = pd.to_numeric(df.get("PREVISÃO DE FECHAMENTO"), errors="coerce")
+        colunas_dia = _colunas_por_ano(df, PADRAO_COLUNA_DIA, 2)
+        colunas_fechamento = _colunas_por_ano(df, PADRAO_COLUNA_FECHAMENTO, 1)
+
+        for ano, coluna in colunas_ano.items():
+            partes.append(pd.DataFrame({
+                "LOJA": lojas,
+                "Ano": ano,
+                "Mes": mes,
+                "Meta": meta if ano == ano_atual else np.nan,
+                "Vendas": pd.to_numeric(df[coluna], errors="coerce"),
+                "Previsao": previsao if ano == ano_atual else np.nan,
+                "DataReferencia": pd.to_datetime(
+                    PADRAO_COLUNA_DIA.match(str(colunas_dia[ano]).strip()).group(1), format="%d/%m/%Y"
+                ) if ano in colunas_dia else pd.NaT,
+                "Fechamento": pd.to_numeric(df[colunas_fechamento[ano]], errors="coerce")
+                if ano in colunas_fechamento else np.nan,
+            }))
+
+    if not partes:
+        return indexar_por_mes(pd.DataFrame(columns=COLUNAS_FATOS))
+
+    fatos = pd.concat(partes, ignore_index=True)
+    fatos = fatos.astype({
+        "Ano": "int16", "Mes": "int8",
+        "Meta": "float64", "Vendas": "float64", "Previsao": "float64",
+        "DataReferencia": "datetime64[ns]", "Fechamento": "float64",
+    })
+    fatos = fatos.sort_values(["Ano", "Mes", "LOJA"], ignore_index=True)[COLUNAS_FATOS]
+    return indexar_por_mes(fatos)
+
+
+registrar("fatos_vendas", ["planilhas_relatorio"], montar_fatos_vendas)
+
+
+def carregar_fatos_vendas():
+    """Retorna a tabela de fatos de vendas de todos os meses (ver montar_fatos_vendas)."""
+    return obter("fatos_vendas")
+
+
+def acumulado_no_ano(fatos, ano, ate_mes):
+    """
+    Totais acumulados (meta, vendas e previsão) de janeiro até `ate_mes` do `ano` e do mesmo
+    período do ano anterior. Retorna um DataFrame indexado por Ano.
+    """
+    atual = acumulado_ano(fatos, (ano, ate_mes))
+    anterior = mesmo_periodo_ano_anterior(fatos, (ano, 1), (ano, ate_mes))
+    return pd.concat([anterior, atual]).groupby("Ano")[["Meta", "Vendas", "Previsao"]].sum(min_count=1)
+
+
+def tendencia_por_loja(fatos):
+    """
+    Vendas de cada loja por período, em formato longo (LOJA, Ano, Mes, Periodo, Vendas),
+    ordenadas cronologicamente. Periodo segue o formato "YYYY-MM".
+    """
+    tendencia = fatos.groupby(["LOJA", "Ano", "Mes"], as_index=False)["Vendas"].sum()
+    tendencia["Periodo"] = (
+        tendencia["Ano"].astype(str) + "-" + tendencia["Mes"].astype(str).str.zfill(2)
+    )
+    return tendencia.sort_values(["Ano", "Mes", "LOJA"], ignore_index=True)
+
+
+def crescimento_anual(fatos):
+    """
+    Crescimento das vendas de cada loja em cada mês em relação ao mesmo mês do ano anterior.
+    Retorna um DataFrame longo com as colunas:
+    LOJA, Mes, Ano, Vendas, VendasAnoAnterior, Crescimento (fração, ex.: 0.12 = 12%).
+    """
+    if fatos.empty:
+        return pd.DataFrame(columns=["LOJA", "Mes", "Ano", "Vendas", "VendasAnoAnterior", "Crescimento"])
+
+    largo = fatos.pivot_table(index=["LOJA", "Mes"], columns="Ano", values="Vendas", aggfunc="sum")
+    # Garante anos consecutivos nas colunas para que o deslocamento aponte sempre para o ano anterior
+    largo = largo.reindex(columns=range(int(largo.columns.min()), int(largo.columns.max()) + 1))
+    anterior = largo.shift(1, axis=1)
+    crescimento = largo / anterior.where(anterior != 0) - 1
+
+    def longo(tabela, nome):
+        return tabela.rename_axis(columns="Ano").reset_index().melt(
+            id_vars=["LOJA", "Mes"], var_name="Ano", value_name=nome
+        )
+
+    resultado = longo(largo, "Vendas")
+    resultado["VendasAnoAnterior"] = longo(anterior, "VendasAnoAnterior")["VendasAnoAnterior"]
+    resultado["Crescimento"] = longo(crescimento, "Crescimento")["Crescimento"]
+    resultado = resultado.dropna(subset=["Vendas"]).astype({"Ano": "int16"})
+    return resultado[["LOJA", "Mes", "Ano", "Vendas", "VendasAnoAnterior", "Crescimento"]].reset_index(drop=True)
+
+
+# Crescimento indexado por mês, para o recorte do mês selecionado sair de uma janela (ver periodos.py)
+registrar("crescimento_lojas", ["fatos_vendas"], lambda fatos: indexar_por_mes(crescimento_anual(fatos)))
+
+
+def ranking_lojas(fatos_periodo, limite=None, piores=False):
+    """
+    Calcula a performance de todas as lojas de um período em uma única operação vetorizada.
+
+    Retorna um DataFrame com as colunas: Posicao, LOJA, Vendas, Meta, Atingimento (fração da meta),
+    Gap (quanto falta para a meta; negativo quando a meta foi superada) e BateuMeta (vazio
+    para lojas sem meta), ordenado do maior para o menor atingimento.
+
+    - limite: quando informado, mantém apenas as `limite` primeiras (ou últimas) lojas do ranking,
+      considerando só as lojas com meta.
+    - piores: se True, o limite seleciona as lojas com menor atingimento.
+    """
+    base = fatos_periodo.groupby("LOJA", as_index=False)[["Vendas", "Meta"]].sum(min_count=1)
+    meta = base["Meta"].to_numpy(dtype="float64")
+    vendas = base["Vendas"].to_numpy(dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base["Atingimento"] = np.where(meta > 0, vendas / meta, np.nan)
+    base["Gap"] = meta - vendas
+    # Sem meta não há como bater ou não bater: fica vazio (pd.NA)
+    base["BateuMeta"] = pd.array(vendas >= meta, dtype="boolean")
+    base.loc[~(meta > 0), "BateuMeta"] = pd.NA
+    base["Posicao"] = base["Atingimento"].rank(ascending=False, method="min").astype("Int64")
+
+    ranking = base.sort_values(["Atingimento", "Vendas"], ascending=False, na_position="last")
+    if limite:
+        com_meta = ranking[ranking["Atingimento"].notna()]
+        ranking = com_meta.tail(limite).iloc[::-1] if piores else com_meta.head(limite)
+    return ranking[["Posicao", "LOJA", "Vendas", "Meta", "Atingimento", "Gap", "BateuMeta"]].reset_index(drop=True)
+
+
+def performance_por_mes(fatos):
+    """
+    Performance de todas as lojas em todos os meses com meta, calculada de uma só vez.
+    Retorna as colunas: Ano, Mes, Posicao (no mês), LOJA, Vendas, Meta, Atingimento, Gap.
+    """
+    base = fatos[fatos["Meta"].notna()].reset_index(drop=True)[["Ano", "Mes", "LOJA", "Vendas", "Meta"]]
+    meta = base["Meta"].to_numpy(dtype="float64")
+    vendas = base["Vendas"].to_numpy(dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base["Atingimento"] = np.where(meta > 0, vendas / meta, np.nan)
+    base["Gap"] = meta - vendas
+    base["Posicao"] = (
+        base.groupby(["Ano", "Mes"])["Atingimento"].rank(ascending=False, method="min").astype("Int64")
+    )
+    return base.sort_values(["Ano", "Mes", "Posicao"], ignore_index=True)[
+        ["Ano", "Mes", "Posicao", "LOJA", "Vendas", "Meta", "Atingimento", "Gap"]
+    ]
+
+
+# Performance de todas as lojas em todos os meses, usada no relatório completo e na API
+registrar("performance_lojas", ["fatos_vendas"], performance_por_mes)